@@ -4,6 +4,22 @@ import ColorBends from './ColorBends';
 export default function App() {
   const [showModal, setShowModal] = useState(false);
 
+  // Carte publiée : nom à empreinte lu dans le manifeste de construction
+  // (toujours revalidé), repli sur la carte statique si le manifeste est absent
+  const ouvrirCarte = async () => {
+    let url = './carte_unesco_france.html';
+    try {
+      const reponse = await fetch(`${import.meta.env.BASE_URL}manifeste_artefacts.json`, { cache: 'no-cache' });
+      if (reponse.ok) {
+        const manifeste = await reponse.json();
+        url = manifeste.artefacts?.carte_unesco_france?.url ?? url;
+      }
+    } catch (erreur) {
+      console.warn('Manifeste des artefacts indisponible :', erreur);
+    }
+    window.location.href = url;
+  };
+
   const codeOptions = [
     {
       title: "Code du WebScraping",
@@ -131,7 +147,7 @@ export default function App() {
           {/* Boutons CTA */}
           <div style={{ display: 'flex', gap: '20px', flexWrap: 'wrap', justifyContent: 'center' }}>
             <button
-              onClick={() => window.location.href = './carte_unesco_france.html'}
+              onClick={ouvrirCarte}
               style={{
                 padding: '18px 40px',
                 background: 'white',
@@ -33,75 +33,240 @@ import webbrowser
 
 import os # Bibliothèque pour interagir avec le système d'exploitation (fichiers, chemins)
 
+import sqlite3 # Base de données locale (historique des instantanés)
+
+import hashlib # Empreintes (hash) pour détecter les lignes modifiées
+
+import unicodedata # Normalisation des noms (accents, formes Unicode)
+
+from datetime import datetime, timezone, timedelta
+
+import json # Sérialisation JSON / GeoJSON (API)
+
+import sys
+
+import time
+
+import math
+
+import bisect # Recherche dichotomique dans des listes triées (index des années)
+
+import threading
+
+import http.client
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Service HTTP de la librairie standard
+
+from urllib.parse import urlparse, parse_qs, urlencode, urljoin
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED, as_completed
+
+import bz2 # Lecture en flux des dumps compressés (.bz2 / .gz)
+
+import gzip
+
+import tarfile # Lecture en flux des dumps HTML Wikimedia Enterprise (.tar.gz)
+
+import io
+
+import contextlib
+
+import asyncio # Pipeline concurrent (files bornées entre les étapes)
+
+import mmap # Lecture des archives de pages sans copie (fichier projeté en mémoire)
+
+import zlib
+
+import functools
+
+import numpy as np # Calcul vectorisé (agrégation en hexagones)
+
+from urllib.parse import unquote
+
+import random # Attente aléatoire entre deux tentatives (backoff avec gigue)
+
+from email.utils import parsedate_to_datetime # En-tête Retry-After au format date HTTP
+
 # ============================================================================
 # CONFIGURATION GLOBALE
 # ============================================================================
 URL_WIKIPEDIA = "https://fr.wikipedia.org/wiki/Liste_du_patrimoine_mondial_en_France"
 
+# Fichier SQLite contenant l'historique des listes scrapées (une version par révision)
+FICHIER_INSTANTANES = "instantanes_unesco.db"
+
+# Fichier SQLite du gazetteer hors ligne (construit depuis un export GeoNames)
+FICHIER_GAZETTEER = "gazetteer_geonames.db"
+
 # En-têtes HTTP pour simuler un navigateur (évite certains blocages)
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 }
 
+# Nouvelles tentatives de téléchargement : nombre maximal d'essais par page
+NB_TENTATIVES_MAX = 4
+
+# Attente avant une nouvelle tentative : base × 2^essai (tirée au hasard sous ce plafond), en secondes
+DELAI_BASE_TENTATIVE = 0.5
+DELAI_MAX_TENTATIVE = 30
+
+# Codes HTTP temporaires (surcharge, maintenance) : la requête est retentée
+CODES_HTTP_TEMPORAIRES = {429, 500, 502, 503, 504}
+
 
 # ============================================================================
 # FONCTIONS DE SCRAPING
 # ============================================================================
 
-# Fonction pour se connecter à Wikipedia et récupérer le HTML de la page
-def se_connecter_au_site(url, headers):
+# Fonction pour télécharger le HTML brut d'une page (sans le parser)
+def recuperer_html(url, headers, session=None, verbeux=True, tentatives=NB_TENTATIVES_MAX,
+                   delai=10, statistiques=None):
     """
-    Étape 1 : Se connecter à la page Wikipedia et obtenir le code source HTML
+    Télécharge le code source HTML d'une page
+    
+    Les erreurs temporaires (codes CODES_HTTP_TEMPORAIRES, timeout, connexion
+    coupée) sont retentées après une attente exponentielle avec gigue, ou
+    après la durée demandée par l'en-tête Retry-After (plafonnée).
     
     Paramètres :
-        url (str) : URL de la page à scraper
+        url (str) : URL de la page à télécharger
         headers (dict) : En-têtes HTTP pour la requête
+        session (Session) : Session requests à réutiliser (connexions persistantes)
+        verbeux (bool) : Affiche les messages de progression
+        tentatives (int) : Nombre maximal d'essais (1 = aucune nouvelle tentative)
+        delai (float) : Délai maximal de connexion / entre deux paquets reçus, en secondes
+        statistiques (dict) : Compteurs complétés si fourni ('tentatives', 'reessais'
+                              et un compteur par cause d'échec, ex: 'http_429', 'timeout')
     
     Retourne :
-        BeautifulSoup : Objet soup contenant le code HTML parsé
+        str : Code HTML de la page
         None : Si une erreur se produit
     """
-    try:
-        # === CONNEXION ET RÉCUPÉRATION DE LA PAGE === Si erreur, on passe aux "exept" plus bas
-        
+    if tentatives < 1:
+        raise ValueError(f"tentatives doit valoir au moins 1 (reçu : {tentatives})")
+    if statistiques is None:
+        statistiques = {}
+    
+    # === CONNEXION ET RÉCUPÉRATION DE LA PAGE === Si erreur, on passe aux "exept" plus bas
+    
+    if verbeux:
         print("📡 Tentative de connexion au site Wikipedia...")
+    
+    client = session if session is not None else requests
+    
+    for essai in range(tentatives):
+        statistiques['tentatives'] = statistiques.get('tentatives', 0) + 1
+        retry_after = None
+        
+        try:
+            # Envoi de la requête HTTP GET vers l'URL (délai max en secondes)
+            response = client.get(url, headers=headers, timeout=delai)
+            
+            # Force l'encodage UTF-8 pour gérer les accents français
+            response.encoding = 'utf-8'
+            
+            # === VÉRIFICATION DE LA RÉPONSE ===
+            
+            # Code 200 = succès
+            if response.status_code == 200:
+                if verbeux:
+                    print("✓ Connexion réussie\n")
+                return response.text
+            
+            cause = f"http_{response.status_code}"
+            message = f"✗ Erreur HTTP {response.status_code} ({url})\n"
+            
+            # Erreur définitive (404, 403...) : inutile de réessayer
+            if response.status_code not in CODES_HTTP_TEMPORAIRES:
+                statistiques[cause] = statistiques.get(cause, 0) + 1
+                print(message)
+                return None
+            retry_after = response.headers.get('Retry-After')
         
-        # Envoi de la requête HTTP GET vers l'URL avec un délai max de 10 secondes
-        response = requests.get(url, headers=headers, timeout=10)
+        # === GESTION DES ERREURS ===
         
-        # Force l'encodage UTF-8 pour gérer les accents français
-        response.encoding = 'utf-8'
+        # Serveur trop lent
+        except requests.exceptions.Timeout:
+            cause = 'timeout'
+            message = "✗ Erreur : Timeout - Le serveur met trop de temps à répondre\n"
         
-        # === VÉRIFICATION DE LA RÉPONSE ===
+        # Impossible de joindre le serveur, ou connexion coupée pendant la réponse
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            cause = 'connexion'
+            message = "✗ Erreur : Impossible de se connecter au site\n"
         
-        # Code 200 = succès, sinon erreur (404, 403, etc.)
-        if response.status_code == 200:
-            print("✓ Connexion réussie\n")
-            
-            # Parse le HTML brut en objet BeautifulSoup manipulable
-            soup = BeautifulSoup(response.text, "html.parser")
-            return soup
-        else:
-            # Affiche le code d'erreur HTTP (ex: 404, 403)
-            print(f"✗ Erreur HTTP {response.status_code}\n")
+        # Toutes les autres erreurs imprévues
+        except Exception as e:
+            statistiques['autre'] = statistiques.get('autre', 0) + 1
+            print(f"✗ Erreur inattendue lors de la connexion : {e}\n")
             return None
+        
+        statistiques[cause] = statistiques.get(cause, 0) + 1
+        if essai + 1 >= tentatives:
+            break
+        
+        # === ATTENTE AVANT LA TENTATIVE SUIVANTE ===
+        attente = delai_avant_tentative(essai, retry_after)
+        statistiques['reessais'] = statistiques.get('reessais', 0) + 1
+        if verbeux:
+            print(f"   ⚠️  {cause} : nouvelle tentative dans {attente:.1f} s "
+                  f"({essai + 2}/{tentatives})")
+        time.sleep(attente)
     
-    # === GESTION DES ERREURS ===
+    print(message)
+    return None
+
+
+# Fonction utilitaire : durée d'attente avant une nouvelle tentative de téléchargement
+def delai_avant_tentative(essai, retry_after=None):
+    """
+    Attente avant la tentative suivante
+
+    - En-tête Retry-After présent (secondes ou date HTTP) : durée demandée par le serveur
+    - Sinon : backoff exponentiel avec gigue complète, tiré dans
+      [0, DELAI_BASE_TENTATIVE × 2^essai] (les clients ne retentent pas tous en même temps)
+    Dans les deux cas, l'attente est plafonnée à DELAI_MAX_TENTATIVE.
+
+    Paramètres :
+        essai (int) : Numéro de l'essai qui vient d'échouer (0 = premier)
+        retry_after (str) : Valeur de l'en-tête Retry-After (None si absent)
+
+    Retourne :
+        float : Attente en secondes
+    """
+    if retry_after:
+        try:
+            attente = float(retry_after)
+        except ValueError:
+            try:
+                attente = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                attente = None
+        if attente is not None:
+            return min(max(attente, 0.0), DELAI_MAX_TENTATIVE)
+
+    return random.uniform(0, min(DELAI_MAX_TENTATIVE, DELAI_BASE_TENTATIVE * 2 ** essai))
+
+
+# Fonction pour se connecter à Wikipedia et récupérer le HTML de la page
+def se_connecter_au_site(url, headers):
+    """
+    Étape 1 : Se connecter à la page Wikipedia et obtenir le code source HTML
     
-    # Serveur trop lent (> 10 secondes)
-    except requests.exceptions.Timeout:
-        print("✗ Erreur : Timeout - Le serveur met trop de temps à répondre\n")
-        return None
+    Paramètres :
+        url (str) : URL de la page à scraper
+        headers (dict) : En-têtes HTTP pour la requête
     
-    # Impossible de joindre le serveur (pas d'internet, URL invalide)
-    except requests.exceptions.ConnectionError:
-        print("✗ Erreur : Impossible de se connecter au site\n")
+    Retourne :
+        BeautifulSoup : Objet soup contenant le code HTML parsé
+        None : Si une erreur se produit
+    """
+    html = recuperer_html(url, headers)
+    if html is None:
         return None
     
-    # Toutes les autres erreurs imprévues
-    except Exception as e:
-        print(f"✗ Erreur inattendue lors de la connexion : {e}\n")
-        return None
+    # Parse le HTML brut en objet BeautifulSoup manipulable
+    return BeautifulSoup(html, "html.parser")
 
 # Fonction pour trouver et extraire le tableau contenant la liste des sites UNESCO
 def extraire_tableau_sites(soup):
@@ -150,6 +315,37 @@ def extraire_tableau_sites(soup):
         print(f"✗ Erreur lors de l'extraction du tableau : {e}\n")
         return None
 
+# Appels de notes en fin de nom : [1], [a], [note 3], [réf. nécessaire]...
+MOTIF_APPELS_NOTES = re.compile(r'\[\s*(?:\d+|[a-z]|note\s*\d+|n\s*\d+|réf[^\]]*|citation[^\]]*)\s*\]',
+                                re.IGNORECASE)
+
+# Espaces insécables et fines (HTML &nbsp; etc.) remplacés par une espace simple
+MOTIF_ESPACES = re.compile(r'[\s\u00a0\u202f\u2009\u2007]+')
+
+# Nettoyage d'une cellule en une seule passe : toute suite d'appels de notes
+# et d'espaces devient une espace simple
+MOTIF_NETTOYAGE_CELLULE = re.compile(
+    f"(?:{MOTIF_APPELS_NOTES.pattern}|{MOTIF_ESPACES.pattern})+", re.IGNORECASE)
+
+
+# Fonction utilitaire : texte nettoyé d'une cellule de tableau
+def texte_cellule(cellule):
+    """
+    Texte d'une cellule sans appels de notes, espaces réparées
+
+    get_text(" ") garde une espace entre deux balises (pas de mots collés),
+    puis une seule substitution précompilée retire les notes [1] et remplace
+    les suites d'espaces (insécables comprises) par une espace simple.
+
+    Paramètres :
+        cellule (Tag) : Cellule <td>/<th> (ou lien)
+
+    Retourne :
+        str : Texte nettoyé (ex: "Île-de-France" pour "Île-de-France&nbsp;[1]")
+    """
+    return MOTIF_NETTOYAGE_CELLULE.sub(' ', cellule.get_text(' ')).strip()
+
+
 # Fonction pour parcourir le tableau et extraire toutes les données de chaque site
 def extraire_donnees_sites(tableau):
     """
@@ -161,12 +357,18 @@ def extraire_donnees_sites(tableau):
     - L'année d'inscription
     - Le type (Culturel/Naturel/Mixte)
     - Les coordonnées géographiques
+    - Les coordonnées de chaque composante (sites "en série" à plusieurs lieux)
+    
+    Le texte des cellules est nettoyé au fil de l'extraction (texte_cellule) et
+    les régions, très répétées, sont internées : une seule chaîne en mémoire
+    par région, et des comparaisons plus rapides lors des regroupements.
     
     Paramètres :
         tableau (Tag) : Élément <table> contenant les sites
     
     Retourne :
-        dict : Dictionnaire contenant 5 listes (sites, regions, types, annees, coordonnees)
+        dict : Dictionnaire contenant 6 listes (sites, regions, types, annees, coordonnees,
+               composantes)
     """
     print("📊 Extraction des données de chaque site...")
     
@@ -176,6 +378,7 @@ def extraire_donnees_sites(tableau):
     types_sites = []
     annees = []
     coordonnees = []
+    composantes = []
     
     try:
         # Parcours de toutes les lignes du tableau (sauf la première = en-tête)
@@ -190,11 +393,11 @@ def extraire_donnees_sites(tableau):
             if len(cellules) >= 6:
                 
                 # --- EXTRACTION DU NOM DU SITE ---
-                # find avec class comme dans le cours, puis .text.strip()
-                site_nom = cellules[0].get_text(strip=True)
+                site_nom = texte_cellule(cellules[0])
                 
                 # --- EXTRACTION DE LA RÉGION ---
-                region = cellules[1].get_text(strip=True)
+                # Chaîne internée : les régions se répètent d'une ligne à l'autre
+                region = sys.intern(texte_cellule(cellules[1]))
                 
                 # --- EXTRACTION DE L'ANNÉE ---
                 annee_texte = cellules[2].get_text(strip=True)
@@ -215,13 +418,16 @@ def extraire_donnees_sites(tableau):
                     type_site = 'Culturel'
                 
                 # --- EXTRACTION DES COORDONNÉES ---
-                # On cherche d'abord un lien avec la classe 'external text'
-                lien_coords = cellules[5].find('a', {'class': 'external text'})
-                if lien_coords:
-                    coords_texte = lien_coords.get_text(strip=True)
+                # On cherche les liens avec la classe 'external text'
+                # (un lien par composante pour les sites en série)
+                liens_coords = cellules[5].find_all('a', {'class': 'external text'})
+                if liens_coords:
+                    # Le premier lien sert de point représentatif du site
+                    coords_texte = texte_cellule(liens_coords[0])
                 else:
                     # Sinon on prend le texte brut de la cellule
-                    coords_texte = cellules[5].get_text(strip=True)
+                    coords_texte = texte_cellule(cellules[5])
+                coords_composantes = [texte_cellule(lien) for lien in liens_coords]
                 
                 # Ajout dans les listes
                 sites.append(site_nom)
@@ -229,6 +435,7 @@ def extraire_donnees_sites(tableau):
                 types_sites.append(type_site)
                 annees.append(annee)
                 coordonnees.append(coords_texte)
+                composantes.append(coords_composantes)
         
         print(f"✓ {len(sites)} sites extraits avec succès\n")
         
@@ -238,7 +445,8 @@ def extraire_donnees_sites(tableau):
             'Region': regions,
             'Type': types_sites,
             'Annee': annees,
-            'Coordonnees_brutes': coordonnees
+            'Coordonnees_brutes': coordonnees,
+            'Composantes_brutes': composantes
         }
         
     except Exception as e:
@@ -246,6 +454,34 @@ def extraire_donnees_sites(tableau):
         return None
 
 
+# Fonction pour lire le numéro de révision Wikipedia de la page scrapée
+def extraire_revision(soup):
+    """
+    Récupère le numéro de révision de la page (variable MediaWiki 'wgRevisionId')
+
+    Paramètres :
+        soup (BeautifulSoup) : Objet contenant le HTML parsé
+
+    Retourne :
+        int : Numéro de révision de la page
+        None : Si la révision n'est pas trouvée
+    """
+    try:
+        # MediaWiki écrit la configuration de la page dans une balise <script>
+        script = soup.find('script', string=re.compile(r'wgRevisionId'))
+        if script is None:
+            return None
+
+        revision_trouvee = MOTIF_REVISION.findall(script.string)
+        if revision_trouvee:
+            return int(revision_trouvee[0])
+        return None
+
+    except Exception as e:
+        print(f"⚠️  Erreur lors de la lecture de la révision : {e}\n")
+        return None
+
+
 # ============================================================================
 # FONCTIONS DE CONVERSION DES COORDONNÉES
 # ============================================================================
@@ -403,16 +639,103 @@ def convertir_toutes_coordonnees(dataframe):
         return dataframe
 
 
-# Fonction pour ajouter manuellement les coordonnées GPS des sites qui n'en ont pas
-def corriger_coordonnees_manquantes(dataframe):
+# Fonction utilitaire : points distincts des composantes d'un site en série
+def points_composantes(liste_brute):
+    """
+    Convertit les coordonnées brutes des composantes d'un site
+
+    Paramètres :
+        liste_brute (list) : Textes de coordonnées (colonne Composantes_brutes)
+
+    Retourne :
+        list : Tuples (latitude, longitude) distincts ; liste vide si moins de 2
+               composantes valides (site décrit par son seul point représentatif)
+    """
+    if not isinstance(liste_brute, list) or len(liste_brute) < 2:
+        return []
+
+    points = [parse_coordonnees(texte) for texte in liste_brute]
+    points = [(lat, lon) for lat, lon in points if lat is not None and lon is not None]
+
+    # Doublons exacts (même lieu cité deux fois) supprimés
+    points = list(dict.fromkeys(points))
+    return points if len(points) >= 2 else []
+
+
+# Fonction pour construire la table des composantes des sites en série
+def extraire_composantes(dataframe):
+    """
+    Construit une table enfant avec une ligne par composante des sites en série
+    
+    Seuls les sites ayant au moins 2 composantes valides y figurent : les autres
+    sont entièrement décrits par leurs colonnes Latitude/Longitude. Les
+    coordonnées sont stockées en float32 (précision ~1 m, deux fois moins de
+    mémoire) car certains sites comptent des dizaines de composantes.
+    
+    Paramètres :
+        dataframe (DataFrame) : DataFrame contenant une colonne 'Composantes_brutes'
+    
+    Retourne :
+        DataFrame : Colonnes id_site (index du site dans dataframe), Latitude, Longitude
+    """
+    print("🧩 Extraction des composantes des sites en série...")
+    
+    ids_sites = []
+    latitudes = []
+    longitudes = []
+    
+    try:
+        if 'Composantes_brutes' not in dataframe:
+            print("✓ Aucune composante disponible\n")
+            return pd.DataFrame({'id_site': [], 'Latitude': [], 'Longitude': []})
+        
+        for id_site, liste_brute in dataframe['Composantes_brutes'].items():
+            for lat, lon in points_composantes(liste_brute):
+                ids_sites.append(id_site)
+                latitudes.append(lat)
+                longitudes.append(lon)
+        
+        composantes = pd.DataFrame({
+            'id_site': pd.to_numeric(pd.Series(ids_sites, dtype='int64'), downcast='integer'),
+            'Latitude': pd.array(latitudes, dtype='float32'),
+            'Longitude': pd.array(longitudes, dtype='float32')
+        })
+        
+        nb_sites_serie = composantes['id_site'].nunique()
+        print(f"✓ {len(composantes)} composantes pour {nb_sites_serie} sites en série\n")
+        return composantes
+        
+    except Exception as e:
+        print(f"✗ Erreur lors de l'extraction des composantes : {e}\n")
+        return pd.DataFrame({'id_site': [], 'Latitude': [], 'Longitude': []})
+
+
+# Corrections manuelles : morceau du nom du site → point représentatif (latitude, longitude)
+CORRECTIONS_MANUELLES = {
+    # Sites des mémoriaux de la Première Guerre mondiale :
+    # on utilise Notre-Dame-de-Lorette comme point représentatif
+    'Première Guerre mondiale': (50.40, 2.71)
+}
+
+
+# Fonction pour compléter les coordonnées GPS des sites qui n'en ont pas
+def corriger_coordonnees_manquantes(dataframe, chemin_gazetteer=FICHIER_GAZETTEER):
     """
-    Corrige manuellement les coordonnées manquantes pour certains sites
+    Complète les coordonnées manquantes des sites
     
     Note : Certains sites UNESCO sont "en série" (plusieurs lieux).
-    On utilise un point représentatif pour la visualisation.
+    Les colonnes Latitude/Longitude gardent un point représentatif ;
+    les composantes sont décrites par extraire_composantes.
+    
+    Ordre de résolution :
+    1. Corrections manuelles (CORRECTIONS_MANUELLES)
+    2. Gazetteer hors ligne : nom du site, puis nom de la région
+    Les sites non résolus restent sans coordonnées (ils ne sont pas placés
+    sur la carte plutôt que d'être empilés sur un point arbitraire).
     
     Paramètres :
         dataframe (DataFrame) : DataFrame avec coordonnées
+        chemin_gazetteer (str) : Base construite par construire_gazetteer (ignorée si absente)
     
     Retourne :
         DataFrame : DataFrame avec coordonnées corrigées
@@ -422,18 +745,42 @@ def corriger_coordonnees_manquantes(dataframe):
     try:
         nb_avant = dataframe['Latitude'].isna().sum()
         
-        # Exemple : Sites des mémoriaux de la Première Guerre mondiale
-        # On utilise Notre-Dame-de-Lorette comme point représentatif
-        dataframe.loc[dataframe['Latitude'].isna(), 'Latitude'] = 50.40
-        dataframe.loc[dataframe['Longitude'].isna(), 'Longitude'] = 2.71
+        # --- CORRECTIONS MANUELLES ---
+        for morceau_nom, (lat, lon) in CORRECTIONS_MANUELLES.items():
+            masque = (dataframe['Latitude'].isna()
+                      & dataframe['Site'].str.contains(morceau_nom, regex=False, na=False))
+            dataframe.loc[masque, 'Latitude'] = lat
+            dataframe.loc[masque, 'Longitude'] = lon
+        
+        # --- GÉOCODAGE HORS LIGNE (nom du site, puis région) ---
+        if dataframe['Latitude'].isna().any() and os.path.exists(chemin_gazetteer):
+            connexion = ouvrir_gazetteer(chemin_gazetteer)
+            try:
+                for colonne in ('Site', 'Region'):
+                    manquants = dataframe['Latitude'].isna()
+                    if not manquants.any():
+                        break
+                    resultats = geocoder_lot(connexion, dataframe.loc[manquants, colonne])
+                    positions = dataframe.loc[manquants, colonne].map(resultats)
+                    trouves = positions.notna()
+                    index_trouves = positions[trouves].index
+                    dataframe.loc[index_trouves, 'Latitude'] = [p[0] for p in positions[trouves]]
+                    dataframe.loc[index_trouves, 'Longitude'] = [p[1] for p in positions[trouves]]
+            finally:
+                connexion.close()
         
         nb_apres = dataframe['Latitude'].isna().sum()
         nb_corriges = nb_avant - nb_apres
         
         if nb_corriges > 0:
-            print(f"✓ {nb_corriges} coordonnées corrigées\n")
+            print(f"✓ {nb_corriges} coordonnées corrigées")
+        else:
+            print("✓ Aucune correction effectuée")
+        
+        if nb_apres > 0:
+            print(f"⚠️  {nb_apres} sites restent sans coordonnées\n")
         else:
-            print("✓ Aucune correction nécessaire\n")
+            print()
         
         return dataframe
         
@@ -442,25 +789,329 @@ def corriger_coordonnees_manquantes(dataframe):
         return dataframe
 
 
+# ============================================================================
+# FONCTIONS DE GÉOCODAGE HORS LIGNE (GAZETTEER GEONAMES)
+# ============================================================================
+
+# Séparateurs utilisés pour découper un nom de site en lieux plus simples
+# (ex: "Cathédrale de Chartres" → "Chartres")
+SEPARATEURS_LIEUX = re.compile(r",|\(|\)|\s[-–]\s|\bde la\b|\bde l'|\bdu\b|\bdes\b|\bde\b|\bd'|\bà\b|\ben\b|\bet\b")
+
+
+# Fonction pour normaliser un nom de lieu (clé de recherche du gazetteer)
+def normaliser_nom_lieu(nom):
+    """
+    Normalise un nom de lieu : sans accents, en minuscules, ponctuation remplacée par des espaces
+
+    Paramètres :
+        nom (str) : Nom brut (ex: "Mont-Saint-Michel")
+
+    Retourne :
+        str : Nom normalisé (ex: "mont saint michel")
+    """
+    if not isinstance(nom, str):
+        return ''
+    sans_accents = unicodedata.normalize('NFKD', nom).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', sans_accents.lower()).split())
+
+
+# Fonction pour ouvrir (et créer si besoin) la base du gazetteer
+def ouvrir_gazetteer(chemin=FICHIER_GAZETTEER):
+    """
+    Ouvre la base SQLite du gazetteer (table des lieux + cache des résultats)
+
+    Paramètres :
+        chemin (str) : Chemin du fichier SQLite
+
+    Retourne :
+        Connection : Connexion sqlite3 ouverte
+    """
+    connexion = sqlite3.connect(chemin)
+    connexion.executescript("""
+        -- Un nom (principal, ASCII ou alternatif) par ligne
+        CREATE TABLE IF NOT EXISTS lieux (
+            nom_normalise  TEXT    NOT NULL,
+            latitude       REAL    NOT NULL,
+            longitude      REAL    NOT NULL,
+            pays           TEXT,
+            population     INTEGER
+        );
+
+        -- Cache persistant des requêtes (latitude NULL = lieu introuvable)
+        CREATE TABLE IF NOT EXISTS cache_geocodage (
+            requete    TEXT PRIMARY KEY,
+            latitude   REAL,
+            longitude  REAL
+        );
+    """)
+    return connexion
+
+
+# Fonction pour charger un export GeoNames (ex: FR.txt, allCountries.txt) dans le gazetteer
+def construire_gazetteer(chemin_export, chemin_base=FICHIER_GAZETTEER, pays=None):
+    """
+    Construit le gazetteer à partir d'un export GeoNames (fichier texte tabulé)
+
+    Format GeoNames : geonameid, name, asciiname, alternatenames, latitude,
+    longitude, feature class, feature code, country code, ..., population
+
+    Le fichier est lu ligne par ligne (mémoire constante), puis un index
+    B-tree est créé sur le nom normalisé : recherche exacte et par préfixe
+    en temps logarithmique.
+
+    Paramètres :
+        chemin_export (str) : Fichier GeoNames (.txt)
+        chemin_base (str) : Base SQLite à (re)construire
+        pays (set) : Codes pays à conserver (ex: {'FR'}), None = tous
+
+    Retourne :
+        int : Nombre de noms indexés
+    """
+    print(f"🧭 Construction du gazetteer depuis {chemin_export}...")
+
+    try:
+        connexion = ouvrir_gazetteer(chemin_base)
+        nb_noms = 0
+
+        with connexion:
+            # Reconstruction complète : l'ancien cache n'est plus valable
+            connexion.execute("DROP INDEX IF EXISTS idx_lieux_nom")
+            connexion.execute("DELETE FROM lieux")
+            connexion.execute("DELETE FROM cache_geocodage")
+
+            lot = []
+            with open(chemin_export, encoding='utf-8') as fichier:
+                for ligne in fichier:
+                    champs = ligne.rstrip('\n').split('\t')
+                    if len(champs) < 15:
+                        continue
+                    if pays is not None and champs[8] not in pays:
+                        continue
+
+                    latitude = float(champs[4])
+                    longitude = float(champs[5])
+                    population = int(champs[14] or 0)
+
+                    # Nom principal, nom ASCII et noms alternatifs, sans doublons
+                    noms = {normaliser_nom_lieu(champs[1]), normaliser_nom_lieu(champs[2])}
+                    if champs[3]:
+                        noms.update(normaliser_nom_lieu(n) for n in champs[3].split(','))
+                    noms.discard('')
+
+                    for nom in noms:
+                        lot.append((nom, latitude, longitude, champs[8], population))
+
+                    if len(lot) >= 50000:
+                        connexion.executemany("INSERT INTO lieux VALUES (?, ?, ?, ?, ?)", lot)
+                        nb_noms += len(lot)
+                        lot = []
+
+            connexion.executemany("INSERT INTO lieux VALUES (?, ?, ?, ?, ?)", lot)
+            nb_noms += len(lot)
+
+            # Index créé après le chargement (beaucoup plus rapide qu'à chaque insertion)
+            connexion.execute("CREATE INDEX idx_lieux_nom ON lieux (nom_normalise, population)")
+
+        connexion.close()
+        print(f"✓ {nb_noms} noms indexés dans {chemin_base}\n")
+        return nb_noms
+
+    except Exception as e:
+        print(f"✗ Erreur lors de la construction du gazetteer : {e}\n")
+        return 0
+
+
+# Fonction pour résoudre un nom (site ou région) en coordonnées avec le gazetteer
+def rechercher_lieu(connexion, nom):
+    """
+    Cherche un lieu dans le gazetteer (sans passer par le cache)
+
+    Stratégie :
+    1. Nom complet exact, puis nom complet comme préfixe
+    2. Morceaux du nom (ex: "Cathédrale de Chartres" → "chartres"),
+       du dernier au premier, en recherche exacte
+    En cas d'homonymes, le lieu le plus peuplé est retenu.
+
+    Paramètres :
+        connexion (Connection) : Base du gazetteer
+        nom (str) : Nom à résoudre
+
+    Retourne :
+        tuple : (latitude, longitude) ou (None, None) si introuvable
+    """
+    requete_exacte = """
+        SELECT latitude, longitude FROM lieux
+        WHERE nom_normalise = ?
+        ORDER BY population DESC LIMIT 1
+    """
+    # Préfixe : intervalle [nom, nom + caractère maximal[ → utilise l'index
+    requete_prefixe = """
+        SELECT latitude, longitude FROM lieux
+        WHERE nom_normalise >= ? AND nom_normalise < ?
+        ORDER BY population DESC LIMIT 1
+    """
+
+    nom_complet = normaliser_nom_lieu(nom)
+    if not nom_complet:
+        return None, None
+
+    resultat = connexion.execute(requete_exacte, (nom_complet,)).fetchone()
+    if resultat is None and len(nom_complet) >= 4:
+        resultat = connexion.execute(requete_prefixe, (nom_complet + ' ', nom_complet + ' \uffff')).fetchone()
+
+    if resultat is None and isinstance(nom, str):
+        morceaux = [normaliser_nom_lieu(m) for m in SEPARATEURS_LIEUX.split(nom)]
+        for morceau in reversed(morceaux):
+            if len(morceau) >= 3 and morceau != nom_complet:
+                resultat = connexion.execute(requete_exacte, (morceau,)).fetchone()
+                if resultat is not None:
+                    break
+
+    if resultat is None:
+        return None, None
+    return resultat
+
+
+# Fonction pour géocoder une série de noms en une seule passe (avec cache persistant)
+def geocoder_lot(connexion, noms):
+    """
+    Géocode un lot de noms : les doublons ne sont résolus qu'une fois et les
+    résultats (y compris les échecs) sont mémorisés dans la table cache_geocodage
+
+    Paramètres :
+        connexion (Connection) : Base du gazetteer
+        noms (iterable) : Noms à géocoder
+
+    Retourne :
+        dict : {nom: (latitude, longitude)} pour les noms trouvés uniquement
+    """
+    noms_uniques = {nom for nom in noms if isinstance(nom, str) and nom}
+    resultats = {}
+
+    # --- LECTURE DU CACHE (par paquets pour rester sous la limite de paramètres SQLite) ---
+    liste_noms = sorted(noms_uniques)
+    deja_en_cache = set()
+    for debut in range(0, len(liste_noms), 500):
+        paquet = liste_noms[debut:debut + 500]
+        requete = ("SELECT requete, latitude, longitude FROM cache_geocodage WHERE requete IN ("
+                   + ','.join('?' * len(paquet)) + ")")
+        for requete_nom, lat, lon in connexion.execute(requete, paquet):
+            deja_en_cache.add(requete_nom)
+            if lat is not None:
+                resultats[requete_nom] = (lat, lon)
+
+    # --- RÉSOLUTION DES NOMS ABSENTS DU CACHE ---
+    nouveaux = []
+    for nom in noms_uniques - deja_en_cache:
+        lat, lon = rechercher_lieu(connexion, nom)
+        nouveaux.append((nom, lat, lon))
+        if lat is not None:
+            resultats[nom] = (lat, lon)
+
+    with connexion:
+        connexion.executemany("INSERT OR REPLACE INTO cache_geocodage VALUES (?, ?, ?)", nouveaux)
+
+    return resultats
+
+
+# ============================================================================
+# FONCTION D'AGRÉGATION - RÉSUMÉ STATISTIQUE
+# ============================================================================
+
+# Fonction pour calculer en un seul passage toutes les statistiques utilisées par les visualisations
+def calculer_resume(dataframe):
+    """
+    Calcule tous les comptages dérivés (type, région, décennie, géolocalisation)
+    avec un seul groupby, puis les dérive du petit tableau de comptages obtenu
+
+    Les graphiques, la légende de la carte et les statistiques finales lisent
+    ce résumé au lieu de refaire chacun leurs propres value_counts.
+
+    Paramètres :
+        dataframe (DataFrame) : DataFrame avec colonnes Type, Region, Annee
+                                (et Latitude/Longitude si disponibles)
+
+    Retourne :
+        dict : {'nb_sites', 'par_type', 'par_region', 'par_decennie',
+                'nb_geolocalises', 'nb_regions', 'nb_types'}
+    """
+    # Décennie (ex: 1998 → 1990), NaN si l'année est inconnue
+    decennies = dataframe['Annee'] // 10 * 10
+
+    # Site géolocalisé = latitude ET longitude connues
+    if 'Latitude' in dataframe and 'Longitude' in dataframe:
+        geolocalises = dataframe['Latitude'].notna() & dataframe['Longitude'].notna()
+    else:
+        geolocalises = pd.Series(False, index=dataframe.index)
+
+    # --- PASSAGE UNIQUE SUR LES DONNÉES ---
+    comptages = dataframe.groupby(
+        [dataframe['Type'], dataframe['Region'], decennies.rename('Decennie'),
+         geolocalises.rename('Geolocalise')],
+        dropna=False, observed=True, sort=False
+    ).size()
+
+    # --- DÉRIVATION DES RÉSUMÉS (sur quelques centaines de lignes au plus) ---
+    par_type = comptages.groupby(level='Type', dropna=False).sum()
+    par_region = comptages.groupby(level='Region', dropna=False).sum()
+
+    par_decennie = comptages.groupby(level='Decennie').sum().sort_index()
+    par_decennie.index = par_decennie.index.astype(int)
+
+    nb_geolocalises = int(comptages[comptages.index.get_level_values('Geolocalise')].sum())
+
+    return {
+        'nb_sites': len(dataframe),
+        'par_type': par_type,
+        'par_region': par_region,
+        'par_decennie': par_decennie,
+        'nb_geolocalises': nb_geolocalises,
+        'nb_regions': len(par_region),
+        'nb_types': len(par_type)
+    }
+
+
 # ============================================================================
 # FONCTIONS DE VISUALISATION - GRAPHIQUES
 # ============================================================================
 
+# Fonction utilitaire : enregistre la figure courante dans un fichier, ou l'affiche
+def enregistrer_ou_afficher_graphique(nom_fichier=None):
+    """
+    Termine la figure matplotlib courante
+
+    Paramètres :
+        nom_fichier (str) : Image à écrire (format déduit de l'extension) ;
+                            None = fenêtre interactive (plt.show)
+    """
+    if nom_fichier is None:
+        plt.show()
+    else:
+        # Métadonnées retirées : mêmes données → même fichier, octet pour octet
+        plt.savefig(nom_fichier, dpi=100, metadata={'Software': None})
+        plt.close()
+
+
 # Fonction pour créer un graphique des 10 régions avec le plus de sites UNESCO
-def creer_graphique_regions(dataframe):
+def creer_graphique_regions(dataframe, resume=None, nom_fichier=None):
     """
     Crée un graphique en barres horizontales du top 10 des régions
     
     Paramètres :
         dataframe (DataFrame) : DataFrame contenant une colonne 'Region'
+        resume (dict) : Résumé déjà calculé par calculer_resume (calculé si None)
+        nom_fichier (str) : Image où enregistrer le graphique (None = affichage à l'écran)
     """
     try:
         print("📊 Création du graphique des régions...")
         
         plt.figure(figsize=(12, 8))
         
-        # Comptage et tri des régions (top 10)
-        top_regions = dataframe['Region'].value_counts().head(10).sort_values()
+        if resume is None:
+            resume = calculer_resume(dataframe)
+        
+        # Tri des régions (top 10) à partir des comptages du résumé
+        top_regions = resume['par_region'].sort_values(ascending=False).head(10).sort_values()
         
         # Création du graphique en barres horizontales
         top_regions.plot(kind='barh', color='#2E86AB')
@@ -470,35 +1121,34 @@ def creer_graphique_regions(dataframe):
         plt.xlabel('Nombre de sites', fontsize=12)
         plt.ylabel('Région', fontsize=12)
         plt.tight_layout()
-        plt.show()
+        enregistrer_ou_afficher_graphique(nom_fichier)
         
-        print("✓ Graphique des régions affiché\n")
+        print(f"✓ Graphique des régions {'sauvegardé : ' + nom_fichier if nom_fichier else 'affiché'}\n")
         
     except Exception as e:
         print(f"✗ Erreur lors de la création du graphique : {e}\n")
 
 
 # Fonction pour créer un graphique des inscriptions UNESCO par décennie
-def creer_graphique_decennies(dataframe):
+def creer_graphique_decennies(dataframe, resume=None, nom_fichier=None):
     """
     Crée un graphique en barres des inscriptions par décennie
     
     Paramètres :
         dataframe (DataFrame) : DataFrame contenant une colonne 'Annee'
+        resume (dict) : Résumé déjà calculé par calculer_resume (calculé si None)
+        nom_fichier (str) : Image où enregistrer le graphique (None = affichage à l'écran)
     """
     try:
         print("📊 Création du graphique par décennie...")
         
-        # On ne garde que les lignes avec une année valide
-        df_avec_annee = dataframe.dropna(subset=['Annee']).copy()
-        
-        # Calcul de la décennie (ex: 1998 → 1990)
-        df_avec_annee['Decennie'] = (df_avec_annee['Annee'] // 10 * 10).astype(int)
+        if resume is None:
+            resume = calculer_resume(dataframe)
         
         plt.figure(figsize=(12, 6))
         
-        # Comptage par décennie
-        comptage_decennies = df_avec_annee['Decennie'].value_counts().sort_index()
+        # Comptage par décennie (années inconnues déjà exclues du résumé)
+        comptage_decennies = resume['par_decennie']
         comptage_decennies.plot(kind='bar', color='#A23B72')
         
         plt.title('Inscriptions au patrimoine UNESCO par décennie', 
@@ -507,29 +1157,34 @@ def creer_graphique_decennies(dataframe):
         plt.ylabel('Nombre de sites inscrits', fontsize=12)
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.show()
+        enregistrer_ou_afficher_graphique(nom_fichier)
         
-        print("✓ Graphique des décennies affiché\n")
+        print(f"✓ Graphique des décennies {'sauvegardé : ' + nom_fichier if nom_fichier else 'affiché'}\n")
         
     except Exception as e:
         print(f"✗ Erreur lors de la création du graphique : {e}\n")
 
 
 # Fonction pour créer un graphique montrant la répartition Culturel/Naturel/Mixte
-def creer_graphique_types(dataframe):
+def creer_graphique_types(dataframe, resume=None, nom_fichier=None):
     """
     Crée un graphique en barres des types de sites
     
     Paramètres :
         dataframe (DataFrame) : DataFrame contenant une colonne 'Type'
+        resume (dict) : Résumé déjà calculé par calculer_resume (calculé si None)
+        nom_fichier (str) : Image où enregistrer le graphique (None = affichage à l'écran)
     """
     try:
         print("📊 Création du graphique des types...")
         
         plt.figure(figsize=(9, 6))
         
-        # Comptage par type
-        comptage_types = dataframe['Type'].value_counts()
+        if resume is None:
+            resume = calculer_resume(dataframe)
+        
+        # Comptage par type (du plus fréquent au moins fréquent)
+        comptage_types = resume['par_type'].sort_values(ascending=False)
         comptage_types.plot(kind='bar', 
                            color=['#F18F01', '#006466', '#C73E1D'])
         
@@ -539,9 +1194,9 @@ def creer_graphique_types(dataframe):
         plt.ylabel('Nombre de sites', fontsize=12)
         plt.xticks(rotation=0)
         plt.tight_layout()
-        plt.show()
+        enregistrer_ou_afficher_graphique(nom_fichier)
         
-        print("✓ Graphique des types affiché\n")
+        print(f"✓ Graphique des types {'sauvegardé : ' + nom_fichier if nom_fichier else 'affiché'}\n")
         
     except Exception as e:
         print(f"✗ Erreur lors de la création du graphique : {e}\n")
@@ -619,10 +1274,395 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
 
 
 # ============================================================================
-# FONCTION PRINCIPALE
+# FONCTIONS D'HISTORISATION - INSTANTANÉS DES LISTES
 # ============================================================================
 
-# Fonction principale qui orchestre toutes les étapes du scraping et de la visualisation
+# Colonnes d'un site conservées dans l'historique (même schéma que extraire_donnees_sites)
+COLONNES_HISTORIQUE = ['Site', 'Region', 'Type', 'Annee', 'Coordonnees_brutes']
+
+
+# Fonction pour ouvrir (et créer si besoin) la base SQLite des instantanés
+def ouvrir_stock_instantanes(chemin=FICHIER_INSTANTANES):
+    """
+    Ouvre la base SQLite contenant l'historique des listes scrapées
+
+    Le stockage est en "ajout seul" : chaque scraping n'écrit que les lignes
+    qui ont changé depuis la révision précédente (ajout, modification ou
+    suppression d'un site). Les index permettent de reconstruire la liste
+    à n'importe quelle révision sans relire le HTML brut.
+
+    Paramètres :
+        chemin (str) : Chemin du fichier SQLite (':memory:' pour une base en mémoire)
+
+    Retourne :
+        Connection : Connexion sqlite3 ouverte
+    """
+    connexion = sqlite3.connect(chemin)
+
+    # Journal WAL : les lectures ne sont pas bloquées pendant une écriture
+    connexion.execute("PRAGMA journal_mode=WAL")
+
+    connexion.executescript("""
+        -- Une ligne par révision de page enregistrée
+        CREATE TABLE IF NOT EXISTS revisions (
+            page        TEXT    NOT NULL,
+            revision    INTEGER NOT NULL,
+            horodatage  TEXT    NOT NULL,
+            nb_sites    INTEGER NOT NULL,
+            PRIMARY KEY (page, revision)
+        );
+
+        -- Une ligne par changement d'un site (jamais mise à jour ni supprimée)
+        CREATE TABLE IF NOT EXISTS versions_sites (
+            page                TEXT    NOT NULL,
+            revision            INTEGER NOT NULL,
+            horodatage          TEXT    NOT NULL,
+            cle                 TEXT    NOT NULL,
+            operation           TEXT    NOT NULL,
+            empreinte           TEXT,
+            site                TEXT,
+            region              TEXT,
+            type                TEXT,
+            annee               INTEGER,
+            coordonnees_brutes  TEXT
+        );
+
+        -- Dernière version d'un site avant une révision donnée
+        CREATE INDEX IF NOT EXISTS idx_versions_cle
+            ON versions_sites (page, cle, revision);
+
+        -- Recherche des changements sur une période
+        CREATE INDEX IF NOT EXISTS idx_versions_date
+            ON versions_sites (page, operation, horodatage);
+
+        -- Composantes des sites en série : une ligne par point, écrites avec
+        -- la version du site (ajout ou modification) à laquelle elles appartiennent
+        CREATE TABLE IF NOT EXISTS composantes_sites (
+            page       TEXT    NOT NULL,
+            revision   INTEGER NOT NULL,
+            cle        TEXT    NOT NULL,
+            latitude   REAL    NOT NULL,
+            longitude  REAL    NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_composantes_cle
+            ON composantes_sites (page, cle, revision);
+    """)
+
+    return connexion
+
+
+# Fonction utilitaire : date ISO 8601 → horodatage UTC au format stocké
+def normaliser_horodatage(date, fin=False):
+    """
+    Convertit une date ISO 8601 au format des horodatages stockés
+    ('2024-06-01T12:00:00+00:00', UTC), comparable comme une chaîne
+
+    Paramètres :
+        date (str) : Date ('2024-06-01') ou date et heure (avec ou sans fuseau ;
+                     sans fuseau = UTC)
+        fin (bool) : Borne de fin : une date seule désigne alors toute la journée
+
+    Retourne :
+        tuple : (horodatage, inclusif) ; pour une date seule en borne de fin,
+                horodatage = lendemain à minuit et inclusif = False
+    """
+    valeur = datetime.fromisoformat(str(date).replace('Z', '+00:00'))
+    if valeur.tzinfo is None:
+        valeur = valeur.replace(tzinfo=timezone.utc)
+    valeur = valeur.astimezone(timezone.utc)
+
+    date_seule = 'T' not in str(date) and ' ' not in str(date).strip()
+    if fin and date_seule:
+        return (valeur + timedelta(days=1)).isoformat(timespec='seconds'), False
+    return valeur.isoformat(timespec='seconds'), True
+
+
+# Fonction utilitaire pour calculer l'empreinte d'un site (détection des changements)
+def calculer_empreinte_site(valeurs):
+    """
+    Calcule une empreinte SHA-1 à partir des valeurs d'un site
+
+    Paramètres :
+        valeurs (list) : Valeurs des colonnes du site (dans l'ordre de COLONNES_HISTORIQUE)
+
+    Retourne :
+        str : Empreinte hexadécimale
+    """
+    texte = '\x1f'.join('' if v is None else str(v) for v in valeurs)
+    return hashlib.sha1(texte.encode('utf-8')).hexdigest()
+
+
+# Fonction pour lire l'état courant (dernière version de chaque site) d'une page
+def lire_etat_courant(connexion, page, revision=None):
+    """
+    Retourne la dernière version connue de chaque site d'une page
+
+    Paramètres :
+        connexion (Connection) : Base des instantanés
+        page (str) : Identifiant de la page (URL)
+        revision (int) : Révision maximale à considérer (None = la plus récente)
+
+    Retourne :
+        dict : {cle: (operation, empreinte, site, region, type, annee, coordonnees_brutes)}
+    """
+    if revision is None:
+        revision = 2**62
+
+    # Pour chaque clé, on ne garde que la version de révision maximale <= revision
+    # (la sous-requête utilise l'index idx_versions_cle)
+    requete = """
+        SELECT v.cle, v.operation, v.empreinte, v.site, v.region, v.type,
+               v.annee, v.coordonnees_brutes
+        FROM versions_sites v
+        WHERE v.page = ?
+          AND v.revision = (SELECT MAX(w.revision) FROM versions_sites w
+                            WHERE w.page = v.page AND w.cle = v.cle
+                              AND w.revision <= ?)
+    """
+    etat = {}
+    for ligne in connexion.execute(requete, (page, revision)):
+        etat[ligne[0]] = ligne[1:]
+    return etat
+
+
+# Fonction pour enregistrer un scraping dans l'historique (seulement les lignes modifiées)
+def enregistrer_instantane(connexion, page, donnees, revision=None, horodatage=None):
+    """
+    Enregistre une révision de la liste dans la base des instantanés
+
+    Seules les différences avec la révision précédente sont écrites :
+    - 'ajout' : site absent de la révision précédente
+    - 'modification' : site présent dont au moins une valeur a changé
+    - 'suppression' : site présent avant mais absent de cette révision
+    Sans colonne Id_site, les sites sont réconciliés avec la dernière
+    révision de la page (reconcilier_sites) : un site renommé garde sa clé.
+    Les composantes des sites en série (colonne Composantes_brutes, si
+    présente) sont converties en points et écrites dans composantes_sites
+    avec chaque ajout ou modification ; elles font partie de l'empreinte.
+
+    Paramètres :
+        connexion (Connection) : Base des instantanés
+        page (str) : Identifiant de la page (URL)
+        donnees (dict/DataFrame) : Données au format de extraire_donnees_sites
+        revision (int) : Numéro de révision Wikipedia (None = révision précédente + 1)
+        horodatage (str) : Date ISO 8601 de la révision (None = maintenant, UTC)
+
+    Retourne :
+        dict : Nombre d'ajouts, de modifications et de suppressions écrits
+    """
+    print("🗄️  Enregistrement de l'instantané dans l'historique...")
+
+    bilan = {'ajout': 0, 'modification': 0, 'suppression': 0}
+
+    try:
+        if horodatage is None:
+            horodatage = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        else:
+            # Même format partout : les bornes de date se comparent comme des chaînes
+            horodatage = normaliser_horodatage(horodatage)[0]
+
+        # Révision inconnue : on prend la suivante de la dernière enregistrée
+        derniere = connexion.execute(
+            "SELECT MAX(revision) FROM revisions WHERE page = ?", (page,)
+        ).fetchone()[0]
+        if revision is None:
+            revision = (derniere or 0) + 1
+
+        # Les différences sont calculées par rapport à la dernière révision :
+        # une révision plus ancienne ne peut plus être insérée après coup
+        if derniere is not None and revision < derniere:
+            print(f"✗ Révision {revision} antérieure à la dernière enregistrée ({derniere})\n")
+            return bilan
+
+        # Révision déjà enregistrée : rien à faire
+        deja_vue = connexion.execute(
+            "SELECT 1 FROM revisions WHERE page = ? AND revision = ?", (page, revision)
+        ).fetchone()
+        if deja_vue:
+            print(f"✓ Révision {revision} déjà enregistrée\n")
+            return bilan
+
+        # --- CONSTRUCTION DES LIGNES DE LA NOUVELLE RÉVISION ---
+        colonnes = [list(donnees[nom]) for nom in COLONNES_HISTORIQUE]
+        if 'Composantes_brutes' in donnees:
+            listes_composantes = list(donnees['Composantes_brutes'])
+        else:
+            listes_composantes = [None] * len(colonnes[0])
+        # Clé stable d'un site : identifiant fourni par la source (Wikidata, Mérimée),
+        # sinon identifiant réconcilié avec la dernière révision de la page ; toutes
+        # les entrées (scraping, pipeline, dumps) obtiennent ainsi les mêmes clés
+        if 'Id_site' in donnees:
+            cles = [str(c) for c in donnees['Id_site']]
+        else:
+            precedente = liste_a_la_revision(connexion, page)
+            noms = pd.DataFrame({'Site': list(donnees['Site'])})
+            cles = list(reconcilier_sites(precedente, noms)['Id_site'])
+
+        nouvelles_lignes = {}
+        composantes = {}
+        for i, cle in enumerate(cles):
+            valeurs = [colonne[i] for colonne in colonnes]
+            # Année : les valeurs manquantes de pandas (NaN) deviennent None
+            annee = valeurs[3]
+            valeurs[3] = int(annee) if annee is not None and annee == annee else None
+
+            # Deux sites homonymes sur la même page : on numérote le doublon
+            cle_unique = cle
+            numero = 2
+            while cle_unique in nouvelles_lignes:
+                cle_unique = f"{cle} ({numero})"
+                numero += 1
+            nouvelles_lignes[cle_unique] = valeurs
+            composantes[cle_unique] = points_composantes(listes_composantes[i])
+
+        # --- COMPARAISON AVEC L'ÉTAT PRÉCÉDENT ---
+        etat_precedent = lire_etat_courant(connexion, page, revision)
+        changements = []
+        lignes_composantes = []
+
+        for cle, valeurs in nouvelles_lignes.items():
+            # Sites sans composantes : même empreinte qu'avant l'ajout de cette table
+            if composantes[cle]:
+                empreinte = calculer_empreinte_site(valeurs + [repr(composantes[cle])])
+            else:
+                empreinte = calculer_empreinte_site(valeurs)
+            ancien = etat_precedent.get(cle)
+
+            if ancien is None or ancien[0] == 'suppression':
+                operation = 'ajout'
+            elif ancien[1] != empreinte:
+                operation = 'modification'
+            else:
+                continue
+
+            changements.append((page, revision, horodatage, cle, operation, empreinte, *valeurs))
+            lignes_composantes.extend((page, revision, cle, lat, lon) for lat, lon in composantes[cle])
+            bilan[operation] += 1
+
+        for cle, ancien in etat_precedent.items():
+            if ancien[0] != 'suppression' and cle not in nouvelles_lignes:
+                changements.append((page, revision, horodatage, cle, 'suppression',
+                                    None, *ancien[2:]))
+                bilan['suppression'] += 1
+
+        # --- ÉCRITURE EN UNE SEULE TRANSACTION ---
+        with connexion:
+            connexion.execute(
+                "INSERT INTO revisions VALUES (?, ?, ?, ?)",
+                (page, revision, horodatage, len(nouvelles_lignes))
+            )
+            connexion.executemany(
+                "INSERT INTO versions_sites VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                changements
+            )
+            connexion.executemany(
+                "INSERT INTO composantes_sites VALUES (?, ?, ?, ?, ?)",
+                lignes_composantes
+            )
+
+        print(f"✓ Révision {revision} : {bilan['ajout']} ajouts, "
+              f"{bilan['modification']} modifications, {bilan['suppression']} suppressions\n")
+        return bilan
+
+    except Exception as e:
+        print(f"✗ Erreur lors de l'enregistrement de l'instantané : {e}\n")
+        return bilan
+
+
+# Fonction pour reconstruire la liste complète telle qu'elle était à une révision donnée
+def liste_a_la_revision(connexion, page, revision=None):
+    """
+    Reconstruit la liste des sites d'une page à une révision donnée
+
+    Paramètres :
+        connexion (Connection) : Base des instantanés
+        page (str) : Identifiant de la page (URL)
+        revision (int) : Révision souhaitée (None = la plus récente)
+
+    Retourne :
+        DataFrame : Liste des sites présents à cette révision (+ colonne Id_site = clé
+                    stockée, + Composantes_brutes relues depuis composantes_sites)
+    """
+    etat = lire_etat_courant(connexion, page, revision)
+
+    # Composantes de la version de chaque site en vigueur à cette révision
+    requete = """
+        SELECT c.cle, c.latitude, c.longitude
+        FROM composantes_sites c
+        WHERE c.page = ?
+          AND c.revision = (SELECT MAX(w.revision) FROM versions_sites w
+                            WHERE w.page = c.page AND w.cle = c.cle
+                              AND w.revision <= ?)
+        ORDER BY c.rowid
+    """
+    composantes = {}
+    for cle, lat, lon in connexion.execute(requete, (page, 2**62 if revision is None else revision)):
+        composantes.setdefault(cle, []).append(f"{lat}, {lon}")
+
+    lignes = [valeurs[2:] + (cle, composantes.get(cle, []))
+              for cle, valeurs in etat.items() if valeurs[0] != 'suppression']
+    return pd.DataFrame(lignes, columns=COLONNES_HISTORIQUE + ['Id_site', 'Composantes_brutes'])
+
+
+# Fonction pour reconstruire la liste telle qu'elle était à une date donnée
+def liste_a_la_date(connexion, page, date):
+    """
+    Reconstruit la liste des sites d'une page à une date donnée
+
+    Paramètres :
+        connexion (Connection) : Base des instantanés
+        page (str) : Identifiant de la page (URL)
+        date (str) : Date ISO 8601 (ex: '2024-06-01' = à la fin de cette journée,
+                     ou '2024-06-01T12:00:00+00:00')
+
+    Retourne :
+        DataFrame : Liste des sites présents à cette date (vide si aucune révision avant)
+    """
+    borne, inclusive = normaliser_horodatage(date, fin=True)
+    revision = connexion.execute(
+        f"SELECT MAX(revision) FROM revisions WHERE page = ? AND horodatage {'<=' if inclusive else '<'} ?",
+        (page, borne)
+    ).fetchone()[0]
+
+    if revision is None:
+        return pd.DataFrame(columns=COLONNES_HISTORIQUE + ['Id_site', 'Composantes_brutes'])
+
+    return liste_a_la_revision(connexion, page, revision)
+
+
+# Fonction pour lister les sites ajoutés entre deux dates
+def sites_ajoutes_entre(connexion, page, date_debut, date_fin):
+    """
+    Liste les sites apparus dans la page entre deux dates (bornes incluses)
+
+    Paramètres :
+        connexion (Connection) : Base des instantanés
+        page (str) : Identifiant de la page (URL)
+        date_debut (str) : Date ISO 8601 de début
+        date_fin (str) : Date ISO 8601 de fin (date seule = journée entière incluse)
+
+    Retourne :
+        DataFrame : Sites ajoutés avec leur révision et leur date d'ajout
+    """
+    debut, _ = normaliser_horodatage(date_debut)
+    fin, inclusive = normaliser_horodatage(date_fin, fin=True)
+    requete = f"""
+        SELECT revision, horodatage, site, region, type, annee, coordonnees_brutes
+        FROM versions_sites
+        WHERE page = ? AND operation = 'ajout'
+          AND horodatage >= ? AND horodatage {'<=' if inclusive else '<'} ?
+        ORDER BY horodatage
+    """
+    lignes = connexion.execute(requete, (page, debut, fin)).fetchall()
+    return pd.DataFrame(lignes, columns=['Revision', 'Horodatage'] + COLONNES_HISTORIQUE)
+
+
+# ============================================================================
+# FONCTION PRINCIPALE
+# ============================================================================
+
+# Fonction principale qui orchestre toutes les étapes du scraping et de la visualisation
 def main():
     """
     Fonction principale orchestrant toutes les étapes du projet
@@ -668,10 +1708,19 @@ def main():
     print("Aperçu des 3 premières lignes :")
     print(df.head(3))
     print()
-    
+
+    # --- ÉTAPE 4 BIS : HISTORISATION DE LA RÉVISION ---
+    connexion = ouvrir_stock_instantanes(FICHIER_INSTANTANES)
+    try:
+        # Les sites renommés gardent l'identifiant de la révision précédente
+        enregistrer_instantane(connexion, URL_WIKIPEDIA, donnees, extraire_revision(soup))
+    finally:
+        connexion.close()
+
     # --- ÉTAPE 5 : CONVERSION DES COORDONNÉES ---
     df = convertir_toutes_coordonnees(df)
     df = corriger_coordonnees_manquantes(df)
+    composantes = extraire_composantes(df)
     
     # --- ÉTAPE 6 : CRÉATION DES GRAPHIQUES ---
     print("="*80)
@@ -679,9 +1728,12 @@ def main():
     print("="*80)
     print()
     
-    creer_graphique_regions(df)
-    creer_graphique_decennies(df)
-    creer_graphique_types(df)
+    # Toutes les statistiques sont calculées une seule fois puis partagées
+    resume = calculer_resume(df)
+    
+    creer_graphique_regions(df, resume)
+    creer_graphique_decennies(df, resume)
+    creer_graphique_types(df, resume)
     
     # --- ÉTAPE 7 : CRÉATION DE LA CARTE ---
     print("="*80)
@@ -689,7 +1741,7 @@ def main():
     print("="*80)
     print()
     
-    creer_carte_interactive(df)
+    creer_carte_interactive(df, resume=resume, composantes=composantes)
     
     # --- FIN ---
     print("="*80)
@@ -697,24 +1749,13 @@ def main():
     print("="*80)
     print()
     print(f"📊 Statistiques finales :")
-    print(f"   • {len(df)} sites UNESCO en France")
-    print(f"   • {df['Latitude'].notna().sum()} sites géolocalisés")
-    print(f"   • {len(df['Region'].unique())} régions représentées")
-    print(f"   • {len(df['Type'].unique())} types de sites")
+    print(f"   • {resume['nb_sites']} sites UNESCO en France")
+    print(f"   • {resume['nb_geolocalises']} sites géolocalisés")
+    print(f"   • {resume['nb_regions']} régions représentées")
+    print(f"   • {resume['nb_types']} types de sites")
     print()
 
 
-# ============================================================================
-# POINT D'ENTRÉE DU PROGRAMME
-# ============================================================================
-
-if __name__ == "__main__":
-    """
-    Point d'entrée : ce bloc s'exécute uniquement si le script est lancé directement
-    (pas si importé comme module)
-    """
-    main()
-
 ## ============================================================================
 # FONCTION DE VISUALISATION - CARTE INTERACTIVE AVANCÉE
 # ============================================================================
@@ -849,21 +1890,25 @@ def creer_popup_html(row, config_couleur):
 
 
 # Fonction pour créer la légende interactive affichée sur la carte Folium
-def creer_legende_html(dataframe):
+def creer_legende_html(dataframe, resume=None):
     """
     Crée le code HTML de la légende affichée sur la carte
     
     Paramètres :
         dataframe (DataFrame) : DataFrame complet pour compter les sites par type
+        resume (dict) : Résumé déjà calculé par calculer_resume (calculé si None)
     
     Retourne :
         str : Code HTML de la légende
     """
-    # Comptage des sites par type
-    nb_culturel = len(dataframe[dataframe['Type'] == 'Culturel'])
-    nb_naturel = len(dataframe[dataframe['Type'] == 'Naturel'])
-    nb_mixte = len(dataframe[dataframe['Type'] == 'Mixte'])
-    nb_total = len(dataframe.dropna(subset=['Latitude', 'Longitude']))
+    if resume is None:
+        resume = calculer_resume(dataframe)
+    
+    # Comptage des sites par type (lu dans le résumé)
+    nb_culturel = int(resume['par_type'].get('Culturel', 0))
+    nb_naturel = int(resume['par_type'].get('Naturel', 0))
+    nb_mixte = int(resume['par_type'].get('Mixte', 0))
+    nb_total = resume['nb_geolocalises']
     
     legende_html = f"""
     <div style="position: fixed; 
@@ -919,14 +1964,61 @@ def creer_legende_html(dataframe):
     return legende_html
 
 
+# Fonction pour ajouter sur la carte les composantes d'un site en série sous forme de cluster
+def ajouter_cluster_composantes(carte, nom_site, points, popup_html, config_couleur):
+    """
+    Ajoute un groupe de marqueurs regroupés (cluster) pour un site en série
+    
+    On utilise FastMarkerCluster : seules les coordonnées sont écrites dans le
+    HTML, les marqueurs sont créés par le navigateur. La popup du site n'est
+    écrite qu'une fois (dans la fonction JavaScript), pas pour chaque composante.
+    
+    Paramètres :
+        carte (Map) : Carte Folium
+        nom_site (str) : Nom du site (info-bulle)
+        points (list) : Liste de [latitude, longitude]
+        popup_html (str) : Contenu HTML de la popup du site
+        config_couleur (dict) : Configuration de couleur et icône
+    """
+    from folium import plugins
+    
+    # Fonction JavaScript appelée pour chaque point : marqueur identique aux autres sites
+    callback = f"""
+    function (point) {{
+        var icone = L.AwesomeMarkers.icon({{
+            icon: {json.dumps(config_couleur['icon'])},
+            iconColor: {json.dumps(config_couleur['color'])},
+            markerColor: 'white',
+            prefix: 'fa'
+        }});
+        var marqueur = L.marker(new L.LatLng(point[0], point[1]), {{icon: icone}});
+        marqueur.bindPopup({json.dumps(popup_html)}, {{maxWidth: 300}});
+        marqueur.bindTooltip({json.dumps('<b>' + str(nom_site) + '</b>')});
+        return marqueur;
+    }}
+    """
+    
+    plugins.FastMarkerCluster(
+        data=points,
+        callback=callback,
+        name=str(nom_site),
+        options={'showCoverageOnHover': True, 'maxClusterRadius': 40}
+    ).add_to(carte)
+
+
 # Fonction avancée pour créer une carte interactive avec plugins, légende et marqueurs personnalisés (écrase la version simple)
-def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
+def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html', resume=None,
+                            composantes=None, densite=False, ouvrir_navigateur=True):
     """
     Crée une carte interactive avancée avec Folium montrant tous les sites UNESCO
     
     Fonctionnalités :
     - Marqueurs colorés et personnalisés par type de site
     - Popups avec informations détaillées
+    - Sites en série : composantes regroupées en clusters (un groupe par site)
+    - Option densité : hexagones précalculés par niveau de zoom ; en zoom
+      rapproché, seuls les sites de la zone affichée deviennent des marqueurs,
+      créés par le navigateur (jeux de données denses)
     - Légende interactive
     - Filtrage géographique (France métropolitaine + DOM-TOM)
     - Bouton plein écran
@@ -936,6 +2028,13 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
     Paramètres :
         dataframe (DataFrame) : DataFrame avec colonnes Latitude, Longitude, Site, Type, etc.
         nom_fichier (str) : Nom du fichier HTML à générer (défaut: 'carte_unesco_france.html')
+        resume (dict) : Résumé déjà calculé par calculer_resume (calculé si None)
+        composantes (DataFrame) : Table produite par extraire_composantes (calculée si None)
+        densite (bool) : Ajoute la couche de densité multi-résolution
+        ouvrir_navigateur (bool) : Ouvre la carte une fois générée (False en traitement par lots)
+    
+    Retourne :
+        str : Chemin du fichier généré, ou None en cas d'erreur
     """
     try:
         print("🗺️  Création de la carte interactive avancée...")
@@ -962,6 +2061,24 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
         marqueurs_ajoutes = 0
         marqueurs_ignores = 0
         
+        # Avec la couche de densité, les clusters des sites en série sont regroupés
+        # pour être masqués tant que le zoom est éloigné, et les autres sites
+        # sont passés en JSON au script de la couche (aucun folium.Marker)
+        if densite:
+            groupe_marqueurs = folium.FeatureGroup(name="Sites", show=False).add_to(carte)
+        else:
+            groupe_marqueurs = carte
+        sites_densite = []
+        
+        # Composantes des sites en série, regroupées par site
+        if composantes is None:
+            composantes = extraire_composantes(dataframe)
+        points_par_site = {
+            id_site: groupe[['Latitude', 'Longitude']].to_numpy(dtype=float).tolist()
+            for id_site, groupe in composantes.groupby('id_site')
+        }
+        nb_composantes = 0
+        
         for index, row in df_carte.iterrows():
             lat = row['Latitude']
             lon = row['Longitude']
@@ -978,6 +2095,20 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
             # Création du contenu HTML de la popup
             popup_html = creer_popup_html(row, config)
             
+            # Site en série : un cluster de ses composantes remplace le marqueur unique
+            points = [p for p in points_par_site.get(index, []) if verifier_coordonnees_france(*p)]
+            if len(points) >= 2:
+                ajouter_cluster_composantes(groupe_marqueurs, row['Site'], points, popup_html, config)
+                marqueurs_ajoutes += 1
+                nb_composantes += len(points)
+                continue
+            
+            if densite:
+                sites_densite.append(donnees_marqueur(lat, lon, row['Site'], row['Region'],
+                                                      row['Type'], row['Annee'], config))
+                marqueurs_ajoutes += 1
+                continue
+            
             # Création et ajout du marqueur sur la carte
             folium.Marker(
                 location=[lat, lon],
@@ -989,16 +2120,24 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
                     icon=config['icon'],         # Icône Font Awesome
                     prefix='fa'                  # Préfixe pour Font Awesome
                 )
-            ).add_to(carte)
+            ).add_to(groupe_marqueurs)
             
             marqueurs_ajoutes += 1
         
         print(f"   → {marqueurs_ajoutes} marqueurs ajoutés")
+        if nb_composantes > 0:
+            print(f"   → {nb_composantes} composantes de sites en série regroupées en clusters")
         if marqueurs_ignores > 0:
             print(f"   → {marqueurs_ignores} marqueurs ignorés (hors France)")
         
+        # --- ÉTAPE 3 BIS : COUCHE DE DENSITÉ ---
+        if densite:
+            nb_hexagones = ajouter_couche_densite(carte, df_carte, groupe_marqueurs, sites_densite)
+            print(f"   → Couche de densité ajoutée ({nb_hexagones} hexagones, "
+                  f"zooms {ZOOM_MIN_DENSITE} à {ZOOM_MAX_DENSITE})")
+        
         # --- ÉTAPE 4 : AJOUT DE LA LÉGENDE ---
-        legende_html = creer_legende_html(dataframe)
+        legende_html = creer_legende_html(dataframe, resume)
         carte.get_root().html.add_child(folium.Element(legende_html))
         print("   → Légende ajoutée")
         
@@ -1024,12 +2163,3159 @@ def creer_carte_interactive(dataframe, nom_fichier='carte_unesco_france.html'):
         print(f"✓ Carte sauvegardée : {nom_fichier}")
 
         # Ouverture dans le navigateur avec chemin absolu
-        chemin_absolu = os.path.abspath(nom_fichier)
-        webbrowser.open('file://' + chemin_absolu)
-        print(f"✓ Carte ouverte dans le navigateur\n")
+        if ouvrir_navigateur:
+            chemin_absolu = os.path.abspath(nom_fichier)
+            webbrowser.open('file://' + chemin_absolu)
+            print(f"✓ Carte ouverte dans le navigateur\n")
+        
+        return nom_fichier
         
     except ImportError as e:
         print(f"✗ Erreur : Module manquant - {e}")
         print("   Installez folium avec : pip install folium\n")
     except Exception as e:
-        print(f"✗ Erreur lors de la création de la carte : {e}\n")
\ No newline at end of file
+        print(f"✗ Erreur lors de la création de la carte : {e}\n")
+    
+    return None
+
+
+# ============================================================================
+# SERVICE HTTP DE CONSULTATION (LECTURE SEULE)
+# ============================================================================
+
+# Taille (en degrés) d'une case de la grille spatiale utilisée pour les requêtes bbox
+TAILLE_CASE_GRILLE = 1.0
+
+# Nombre de résultats par page par défaut / maximum
+LIMITE_PAR_DEFAUT = 100
+LIMITE_MAXIMUM = 1000
+
+
+# Fonction pour charger le jeu de données servi par l'API (dernière révision historisée)
+def charger_donnees_service(chemin_instantanes=FICHIER_INSTANTANES, page=URL_WIKIPEDIA):
+    """
+    Charge la dernière liste enregistrée dans l'historique, sans relancer le scraping
+
+    Paramètres :
+        chemin_instantanes (str) : Fichier SQLite des instantanés
+        page (str) : Identifiant de la page (URL)
+
+    Retourne :
+        DataFrame : Liste des sites avec colonnes Latitude et Longitude
+    """
+    connexion = ouvrir_stock_instantanes(chemin_instantanes)
+    try:
+        dataframe = liste_a_la_revision(connexion, page)
+    finally:
+        connexion.close()
+
+    return convertir_toutes_coordonnees(dataframe)
+
+
+# Fonction pour construire les index en mémoire (région, type, année, grille spatiale)
+def construire_index_service(dataframe):
+    """
+    Prépare les enregistrements JSON et les index utilisés par l'API
+
+    Paramètres :
+        dataframe (DataFrame) : DataFrame avec colonnes Site, Region, Type, Annee, Latitude, Longitude
+
+    Retourne :
+        dict : {'sites': liste d'enregistrements, 'region': {...}, 'type': {...},
+                'annees': liste triée (annee, position), 'grille': {...}, 'version': str}
+    """
+    sites = []
+    index_region = {}
+    index_type = {}
+    annees = []
+    grille = {}
+
+    colonnes = ['Site', 'Region', 'Type', 'Annee', 'Latitude', 'Longitude']
+    for position, (site, region, type_site, annee, lat, lon) in enumerate(
+            dataframe[colonnes].itertuples(index=False, name=None)):
+
+        # Les NaN de pandas ne sont pas du JSON valide : on les remplace par None
+        annee = int(annee) if pd.notna(annee) else None
+        lat = float(lat) if pd.notna(lat) else None
+        lon = float(lon) if pd.notna(lon) else None
+
+        sites.append({
+            'Site': site, 'Region': region, 'Type': type_site,
+            'Annee': annee, 'Latitude': lat, 'Longitude': lon
+        })
+
+        index_region.setdefault(region, []).append(position)
+        index_type.setdefault(type_site, []).append(position)
+        if annee is not None:
+            annees.append((annee, position))
+        if lat is not None and lon is not None:
+            case = (int(lat // TAILLE_CASE_GRILLE), int(lon // TAILLE_CASE_GRILLE))
+            grille.setdefault(case, []).append(position)
+
+    annees.sort()
+
+    # Version du jeu de données : sert de base aux ETag (change si une donnée change)
+    version = hashlib.sha1(
+        json.dumps(sites, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:16]
+
+    return {
+        'sites': sites,
+        'region': index_region,
+        'type': index_type,
+        'annees': annees,
+        'grille': grille,
+        'version': version
+    }
+
+
+# Fonction pour sélectionner les sites correspondant aux filtres d'une requête
+def rechercher_sites(index, region=None, type_site=None, annee_min=None, annee_max=None,
+                     bbox=None):
+    """
+    Applique les filtres en partant de l'index le plus sélectif
+
+    Paramètres :
+        index (dict) : Index construits par construire_index_service
+        region (str) : Région exacte
+        type_site (str) : Type exact ('Culturel', 'Naturel', 'Mixte')
+        annee_min (int) : Année d'inscription minimale (incluse)
+        annee_max (int) : Année d'inscription maximale (incluse)
+        bbox (tuple) : (lon_min, lat_min, lon_max, lat_max)
+
+    Retourne :
+        list : Positions des sites retenus, triées
+    """
+    # --- LISTES DE CANDIDATS FOURNIES PAR LES INDEX ---
+    listes = []
+
+    if region is not None:
+        listes.append(index['region'].get(region, []))
+
+    if type_site is not None:
+        listes.append(index['type'].get(type_site, []))
+
+    if annee_min is not None or annee_max is not None:
+        # Recherche dichotomique dans la liste triée des années
+        debut = bisect.bisect_left(index['annees'], (annee_min, -1)) if annee_min is not None else 0
+        fin = (bisect.bisect_right(index['annees'], (annee_max, len(index['sites'])))
+               if annee_max is not None else len(index['annees']))
+        listes.append([position for _, position in index['annees'][debut:fin]])
+
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        dans_grille = []
+        lat_debut, lat_fin = int(lat_min // TAILLE_CASE_GRILLE), int(lat_max // TAILLE_CASE_GRILLE)
+        lon_debut, lon_fin = int(lon_min // TAILLE_CASE_GRILLE), int(lon_max // TAILLE_CASE_GRILLE)
+        nb_cases = (lat_fin - lat_debut + 1) * (lon_fin - lon_debut + 1)
+        if nb_cases > len(index['grille']):
+            # Bbox plus large que la grille remplie : on parcourt les cases existantes
+            for (case_lat, case_lon), positions in index['grille'].items():
+                if lat_debut <= case_lat <= lat_fin and lon_debut <= case_lon <= lon_fin:
+                    dans_grille.extend(positions)
+        else:
+            # On ne parcourt que les cases de la grille qui touchent la bbox
+            for case_lat in range(lat_debut, lat_fin + 1):
+                for case_lon in range(lon_debut, lon_fin + 1):
+                    dans_grille.extend(index['grille'].get((case_lat, case_lon), []))
+        listes.append(dans_grille)
+
+    if not listes:
+        return list(range(len(index['sites'])))
+
+    # --- FILTRAGE ---
+    # On part de l'index le plus sélectif puis on vérifie les autres filtres
+    # directement sur l'enregistrement (moins coûteux que d'intersecter des ensembles)
+    resultat = []
+    for position in min(listes, key=len):
+        site = index['sites'][position]
+        if region is not None and site['Region'] != region:
+            continue
+        if type_site is not None and site['Type'] != type_site:
+            continue
+        if annee_min is not None and (site['Annee'] is None or site['Annee'] < annee_min):
+            continue
+        if annee_max is not None and (site['Annee'] is None or site['Annee'] > annee_max):
+            continue
+        if bbox is not None and (site['Latitude'] is None
+                                 or not lat_min <= site['Latitude'] <= lat_max
+                                 or not lon_min <= site['Longitude'] <= lon_max):
+            continue
+        resultat.append(position)
+
+    resultat.sort()
+    return resultat
+
+
+# Fonction pour convertir une liste de sites en FeatureCollection GeoJSON
+def sites_en_geojson(sites):
+    """
+    Convertit des enregistrements de sites en GeoJSON (sites sans coordonnées ignorés)
+
+    Paramètres :
+        sites (list) : Enregistrements produits par construire_index_service
+
+    Retourne :
+        dict : FeatureCollection GeoJSON
+    """
+    features = []
+    for site in sites:
+        if site['Latitude'] is None or site['Longitude'] is None:
+            continue
+        proprietes = {cle: valeur for cle, valeur in site.items()
+                      if cle not in ('Latitude', 'Longitude')}
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [site['Longitude'], site['Latitude']]},
+            'properties': proprietes
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# Gestionnaire HTTP : une instance par requête, les index sont partagés (attribut de classe)
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    """
+    Répond aux requêtes GET de l'API :
+    - /sites          → JSON paginé
+    - /sites.geojson  → GeoJSON paginé
+    - /sante          → état du service
+
+    Paramètres de requête : region, type, annee_min, annee_max,
+    bbox=lon_min,lat_min,lon_max,lat_max, offset, limite
+    """
+    protocol_version = 'HTTP/1.1'   # Connexions persistantes (keep-alive)
+    index = None
+
+    def log_message(self, format, *args):
+        # Pas de ligne de journal par requête (trop bavard sous charge)
+        pass
+
+    def envoyer_json(self, code, contenu, etag=None, type_contenu='application/json'):
+        corps = json.dumps(contenu, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', f'{type_contenu}; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'public, max-age=60')
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametres = {cle: valeurs[0] for cle, valeurs in parse_qs(url.query).items()}
+
+        if url.path == '/sante':
+            self.envoyer_json(200, {'statut': 'ok', 'sites': len(self.index['sites']),
+                                    'version': self.index['version']})
+            return
+
+        if url.path not in ('/sites', '/sites.geojson'):
+            self.envoyer_json(404, {'erreur': f"Chemin inconnu : {url.path}"})
+            return
+
+        # --- ETAG : les données ne changent pas tant que le service tourne ---
+        etag = '"' + hashlib.sha1(
+            (self.index['version'] + self.path).encode('utf-8')
+        ).hexdigest()[:20] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        # --- LECTURE DES FILTRES ---
+        try:
+            bbox = None
+            if 'bbox' in parametres:
+                bbox = tuple(float(v) for v in parametres['bbox'].split(','))
+                if len(bbox) != 4:
+                    raise ValueError("bbox attend 4 valeurs : lon_min,lat_min,lon_max,lat_max")
+                # nan / inf feraient échouer le calcul des cases de la grille
+                if not all(math.isfinite(v) for v in bbox):
+                    raise ValueError("bbox attend des nombres finis")
+                if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+                    raise ValueError("bbox attend lon_min <= lon_max et lat_min <= lat_max")
+                if not (-180 <= bbox[0] and bbox[2] <= 180 and -90 <= bbox[1] and bbox[3] <= 90):
+                    raise ValueError("bbox attend des longitudes dans [-180, 180] "
+                                     "et des latitudes dans [-90, 90]")
+
+            annee_min = int(parametres['annee_min']) if 'annee_min' in parametres else None
+            annee_max = int(parametres['annee_max']) if 'annee_max' in parametres else None
+            offset = max(int(parametres.get('offset', 0)), 0)
+            limite = min(max(int(parametres.get('limite', LIMITE_PAR_DEFAUT)), 1), LIMITE_MAXIMUM)
+        except ValueError as e:
+            self.envoyer_json(400, {'erreur': f"Paramètre invalide : {e}"})
+            return
+
+        positions = rechercher_sites(self.index, parametres.get('region'), parametres.get('type'),
+                                     annee_min, annee_max, bbox)
+
+        # --- PAGINATION ---
+        page_sites = [self.index['sites'][p] for p in positions[offset:offset + limite]]
+        pagination = {'total': len(positions), 'offset': offset, 'limite': limite}
+        if offset + limite < len(positions):
+            suivant = dict(parametres, offset=offset + limite, limite=limite)
+            pagination['suivant'] = f"{url.path}?{urlencode(suivant)}"
+
+        if url.path == '/sites.geojson':
+            contenu = sites_en_geojson(page_sites)
+            contenu['pagination'] = pagination
+            self.envoyer_json(200, contenu, etag, 'application/geo+json')
+        else:
+            self.envoyer_json(200, {'sites': page_sites, 'pagination': pagination}, etag)
+
+
+# Fonction pour démarrer le service HTTP (bloquant, Ctrl+C pour arrêter)
+def lancer_serveur_api(dataframe, hote='127.0.0.1', port=8000):
+    """
+    Charge le jeu de données en mémoire une seule fois puis sert l'API
+
+    Paramètres :
+        dataframe (DataFrame) : Données des sites (avec Latitude/Longitude)
+        hote (str) : Adresse d'écoute
+        port (int) : Port d'écoute
+    """
+    print("🌐 Démarrage du service HTTP...")
+
+    GestionnaireAPI.index = construire_index_service(dataframe)
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireAPI)
+
+    print(f"✓ {len(GestionnaireAPI.index['sites'])} sites indexés (version {GestionnaireAPI.index['version']})")
+    print(f"✓ Service disponible sur http://{hote}:{port}/sites\n")
+
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Service arrêté\n")
+    finally:
+        serveur.server_close()
+
+
+# Fonction utilitaire pour calculer un percentile sur une liste déjà triée
+def percentile(valeurs_triees, pourcentage):
+    """
+    Percentile par la méthode du rang le plus proche
+
+    Paramètres :
+        valeurs_triees (list) : Valeurs triées par ordre croissant
+        pourcentage (float) : Percentile voulu (ex: 99)
+
+    Retourne :
+        float : Valeur du percentile (None si la liste est vide)
+    """
+    if not valeurs_triees:
+        return None
+    rang = max(int(math.ceil(pourcentage / 100 * len(valeurs_triees))) - 1, 0)
+    return valeurs_triees[rang]
+
+
+# Fonction pour mesurer les latences de l'API à un débit cible (test de charge)
+def tester_charge_api(url, qps=100, duree=10, concurrence=16):
+    """
+    Envoie des requêtes GET à débit constant et mesure les latences
+
+    Les requêtes sont planifiées à intervalle régulier (1/qps) : si le service
+    ralentit, le retard est compté dans la latence (pas d'« omission coordonnée »).
+
+    Paramètres :
+        url (str) : URL complète à interroger (ex: 'http://127.0.0.1:8000/sites?type=Naturel')
+        qps (float) : Nombre de requêtes par seconde visé
+        duree (float) : Durée du test en secondes
+        concurrence (int) : Nombre de connexions HTTP simultanées
+
+    Retourne :
+        dict : Débit obtenu, p50/p99 en millisecondes, nombre d'erreurs
+    """
+    print(f"⏱️  Test de charge : {qps} req/s pendant {duree} s sur {url}")
+
+    cible = urlparse(url)
+    chemin = cible.path + ('?' + cible.query if cible.query else '')
+    connexions = threading.local()
+    nb_requetes = int(qps * duree)
+
+    def envoyer(numero, debut_test):
+        # Attente de l'instant prévu pour cette requête
+        prevu = debut_test + numero / qps
+        attente = prevu - time.perf_counter()
+        if attente > 0:
+            time.sleep(attente)
+
+        if not hasattr(connexions, 'http'):
+            connexions.http = http.client.HTTPConnection(cible.hostname, cible.port or 80, timeout=10)
+        try:
+            connexions.http.request('GET', chemin)
+            reponse = connexions.http.getresponse()
+            reponse.read()
+            succes = reponse.status in (200, 304)
+        except (OSError, http.client.HTTPException):
+            connexions.http.close()
+            del connexions.http
+            succes = False
+
+        return (time.perf_counter() - prevu) * 1000, succes
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrence) as executeur:
+        resultats = list(executeur.map(lambda n: envoyer(n, debut), range(nb_requetes)))
+    duree_reelle = time.perf_counter() - debut
+
+    latences = sorted(latence for latence, succes in resultats if succes)
+    rapport = {
+        'requetes': nb_requetes,
+        'erreurs': sum(1 for _, succes in resultats if not succes),
+        'qps_obtenu': nb_requetes / duree_reelle,
+        'p50_ms': percentile(latences, 50),
+        'p99_ms': percentile(latences, 99)
+    }
+
+    print(f"✓ {rapport['qps_obtenu']:.0f} req/s obtenues, {rapport['erreurs']} erreurs")
+    if latences:
+        print(f"   → p50 = {rapport['p50_ms']:.2f} ms, p99 = {rapport['p99_ms']:.2f} ms\n")
+    return rapport
+
+
+# ============================================================================
+# INGESTION HORS LIGNE - DUMP JSON WIKIDATA
+# ============================================================================
+
+# Propriété Wikidata "identifiant du patrimoine mondial de l'UNESCO"
+PROPRIETE_UNESCO = 'P757'
+
+# Identifiant de "page" sous lequel les ingestions Wikidata sont historisées
+PAGE_WIKIDATA = 'wikidata:P757'
+
+# Numéros de critères UNESCO : (i) à (vi) culturels, (vii) à (x) naturels
+CRITERES_CULTURELS = {'i', 'ii', 'iii', 'iv', 'v', 'vi'}
+CRITERES_NATURELS = {'vii', 'viii', 'ix', 'x'}
+
+# Identifiant de l'entité en début de ligne du dump (évite de parser le JSON)
+MOTIF_ID_ENTITE = re.compile(rb'"id"\s*:\s*"(Q\d+)"')
+
+# Entité "site du patrimoine mondial" (valeur de P1435 qui porte la date d'inscription)
+ENTITE_PATRIMOINE_MONDIAL = 'Q9259'
+
+# Année d'une date Wikidata : signe obligatoire, 4 chiffres ou plus (ex: "-17000-00-00T00:00:00Z")
+MOTIF_ANNEE_WIKIDATA = re.compile(r'^([+-])(\d+)-')
+
+
+# Fonction pour ouvrir un dump en lecture binaire, compressé ou non
+def ouvrir_flux_dump(chemin):
+    """
+    Ouvre un dump en flux binaire selon son extension (.bz2, .gz ou non compressé)
+
+    Paramètres :
+        chemin (str) : Chemin du dump
+
+    Retourne :
+        file : Fichier binaire lisible ligne par ligne
+    """
+    if chemin.endswith('.bz2'):
+        return bz2.open(chemin, 'rb')
+    if chemin.endswith('.gz'):
+        return gzip.open(chemin, 'rb')
+    return open(chemin, 'rb')
+
+
+# Fonction pour parcourir les lignes d'un dump (ou d'une tranche d'octets d'un dump non compressé)
+def lire_lignes_dump(chemin, debut=0, fin=None):
+    """
+    Générateur des lignes d'un dump Wikidata (une entité JSON par ligne)
+
+    Pour une tranche [debut, fin[, une ligne appartient à la tranche dans
+    laquelle elle commence : chaque ligne est lue par exactement un processus.
+
+    Paramètres :
+        chemin (str) : Chemin du dump
+        debut (int) : Octet de début (fichiers non compressés uniquement)
+        fin (int) : Octet de fin exclu (None = fin du fichier)
+
+    Retourne :
+        generator : Lignes (bytes)
+    """
+    with ouvrir_flux_dump(chemin) as flux:
+        if debut > 0:
+            # On se place juste avant debut pour savoir si une ligne y commence
+            flux.seek(debut - 1)
+            flux.readline()
+
+        position = flux.tell()
+        for ligne in flux:
+            if fin is not None and position >= fin:
+                break
+            position += len(ligne)
+            yield ligne
+
+
+# Fonction utilitaire pour lire les valeurs d'une propriété dans les déclarations d'une entité
+def valeurs_propriete(entite, propriete):
+    """
+    Retourne les valeurs (datavalue.value) des déclarations d'une propriété
+
+    Paramètres :
+        entite (dict) : Entité Wikidata
+        propriete (str) : Identifiant de propriété (ex: 'P625')
+
+    Retourne :
+        list : Valeurs trouvées (les déclarations sans valeur sont ignorées)
+    """
+    valeurs = []
+    for declaration in entite.get('claims', {}).get(propriete, []):
+        valeur = declaration.get('mainsnak', {}).get('datavalue', {}).get('value')
+        if valeur is not None:
+            valeurs.append(valeur)
+    return valeurs
+
+
+# Fonction utilitaire : année (signée) d'une date Wikidata
+def annee_wikidata(temps):
+    """
+    Extrait l'année d'une valeur de temps Wikidata, y compris avant notre ère
+
+    Paramètres :
+        temps (str) : Valeur 'time' (ex: "+1979-00-00T00:00:00Z", "-17000-00-00T00:00:00Z")
+
+    Retourne :
+        int : Année (négative avant notre ère), ou None si le format est inconnu
+    """
+    correspondance = MOTIF_ANNEE_WIKIDATA.match(temps or '')
+    if correspondance is None:
+        return None
+    annee = int(correspondance.group(2))
+    return -annee if correspondance.group(1) == '-' else annee
+
+
+# Fonction pour convertir une entité Wikidata en enregistrement au format du scraper
+def entite_en_enregistrement(entite):
+    """
+    Extrait d'une entité Wikidata les champs du schéma de extraire_donnees_sites
+
+    - Site : libellé français (sinon anglais)
+    - Region : entité de P131 (localisation administrative)
+    - Pays : entité de P17
+    - Annee : qualificatif P580 (date de début) de la déclaration P1435 dont la
+              valeur est Q9259 (patrimoine mondial) ; les autres statuts
+              (monument historique...) sont ignorés
+    - Annee_creation : P571 (date de création), colonne distincte de Annee
+    - Type : d'après les critères P2614 (résolu par libelles_criteres)
+    - Coordonnees_brutes / Composantes_brutes : P625, en degrés décimaux
+
+    Paramètres :
+        entite (dict) : Entité Wikidata ayant la propriété P757
+
+    Retourne :
+        dict : Enregistrement du site
+    """
+    libelles = entite.get('labels', {})
+    nom = (libelles.get('fr') or libelles.get('en') or {}).get('value', entite.get('id'))
+
+    # --- ANNÉE D'INSCRIPTION (DÉCLARATIONS "PATRIMOINE MONDIAL" UNIQUEMENT) ---
+    annees = []
+    for declaration in entite.get('claims', {}).get('P1435', []):
+        statut = declaration.get('mainsnak', {}).get('datavalue', {}).get('value', {})
+        if not isinstance(statut, dict) or statut.get('id') != ENTITE_PATRIMOINE_MONDIAL:
+            continue
+        for qualificatif in declaration.get('qualifiers', {}).get('P580', []):
+            annee = annee_wikidata(qualificatif.get('datavalue', {}).get('value', {}).get('time'))
+            if annee is not None:
+                annees.append(annee)
+
+    # --- DATE DE CRÉATION (CONSTRUCTION), GARDÉE À PART ---
+    annees_creation = [annee_wikidata(v.get('time')) for v in valeurs_propriete(entite, 'P571')
+                       if isinstance(v, dict)]
+    annees_creation = [annee for annee in annees_creation if annee is not None]
+
+    # --- COORDONNÉES (une par composante) ---
+    points = [f"{v['latitude']}, {v['longitude']}" for v in valeurs_propriete(entite, 'P625')
+              if 'latitude' in v and 'longitude' in v]
+
+    regions = [v['id'] for v in valeurs_propriete(entite, 'P131') if 'id' in v]
+    pays = [v['id'] for v in valeurs_propriete(entite, 'P17') if 'id' in v]
+    criteres = [v['id'] for v in valeurs_propriete(entite, 'P2614') if 'id' in v]
+
+    return {
+        'Site': nom,
+        'Region': regions[0] if regions else None,
+        'Type': criteres,
+        'Annee': min(annees) if annees else None,
+        'Annee_creation': min(annees_creation) if annees_creation else None,
+        'Coordonnees_brutes': points[0] if points else '',
+        'Composantes_brutes': points,
+        'Pays': pays[0] if pays else None,
+        'Id_UNESCO': valeurs_propriete(entite, PROPRIETE_UNESCO)[0],
+        'Id_wikidata': entite.get('id')
+    }
+
+
+# Fonction exécutée par chaque processus : filtre une tranche du dump
+def traiter_tranche_wikidata(chemin, debut=0, fin=None):
+    """
+    Parcourt une tranche du dump et convertit les entités ayant la propriété P757
+
+    Le test sur les octets bruts ('"P757"' présent dans la ligne) évite de
+    décoder le JSON des millions d'entités qui ne sont pas des sites UNESCO.
+
+    Paramètres :
+        chemin (str) : Chemin du dump
+        debut (int) : Octet de début
+        fin (int) : Octet de fin exclu (None = fin du fichier)
+
+    Retourne :
+        list : Enregistrements des sites trouvés dans la tranche
+    """
+    marqueur = f'"{PROPRIETE_UNESCO}"'.encode('ascii')
+    enregistrements = []
+
+    for ligne in lire_lignes_dump(chemin, debut, fin):
+        if marqueur not in ligne:
+            continue
+        ligne = ligne.strip().rstrip(b',')
+        if not ligne.startswith(b'{'):
+            continue
+        entite = json.loads(ligne)
+        if PROPRIETE_UNESCO in entite.get('claims', {}) and valeurs_propriete(entite, PROPRIETE_UNESCO):
+            enregistrements.append(entite_en_enregistrement(entite))
+
+    return enregistrements
+
+
+# Fonction pour récupérer les libellés d'un ensemble d'entités (deuxième passe sur le dump)
+def lire_libelles_wikidata(chemin, identifiants):
+    """
+    Relit le dump pour trouver le libellé français (sinon anglais) des entités demandées
+
+    Paramètres :
+        chemin (str) : Chemin du dump
+        identifiants (set) : Identifiants recherchés (ex: {'Q90', 'Q142'})
+
+    Retourne :
+        dict : {identifiant: libellé}
+    """
+    libelles = {}
+    if not identifiants:
+        return libelles
+
+    for ligne in lire_lignes_dump(chemin):
+        # L'identifiant est lu dans le début de ligne, sans décoder le JSON
+        trouve = MOTIF_ID_ENTITE.search(ligne, 0, 300)
+        if trouve is None or trouve.group(1).decode('ascii') not in identifiants:
+            continue
+
+        entite = json.loads(ligne.strip().rstrip(b','))
+        valeurs = entite.get('labels', {})
+        libelle = (valeurs.get('fr') or valeurs.get('en') or {}).get('value')
+        if libelle:
+            libelles[entite['id']] = libelle
+            if len(libelles) == len(identifiants):
+                break
+
+    return libelles
+
+
+# Fonction utilitaire pour déduire le type (Culturel/Naturel/Mixte) des libellés des critères
+def type_depuis_criteres(libelles_criteres):
+    """
+    Déduit le type d'un site de ses critères UNESCO (ex: "critère (vii)")
+
+    Paramètres :
+        libelles_criteres (list) : Libellés des critères du site
+
+    Retourne :
+        str : 'Culturel', 'Naturel', 'Mixte' ou None si aucun critère reconnu
+    """
+    numeros = set()
+    for libelle in libelles_criteres:
+        numeros.update(re.findall(r'\(([ivx]+)\)', libelle.lower()))
+
+    culturel = bool(numeros & CRITERES_CULTURELS)
+    naturel = bool(numeros & CRITERES_NATURELS)
+    if culturel and naturel:
+        return 'Mixte'
+    if naturel:
+        return 'Naturel'
+    if culturel:
+        return 'Culturel'
+    return None
+
+
+# Fonction principale de l'ingestion : dump Wikidata → données au format du scraper
+def ingerer_dump_wikidata(chemin, processus=1, resoudre_libelles=True):
+    """
+    Lit un dump JSON Wikidata en flux (mémoire constante) et extrait les sites UNESCO
+
+    - Dump non compressé : découpé en tranches d'octets traitées en parallèle
+    - Dump .bz2 / .gz : lu par un seul processus (un flux compressé ne peut
+      pas être repris au milieu)
+
+    Paramètres :
+        chemin (str) : Chemin du dump (ex: 'latest-all.json.bz2')
+        processus (int) : Nombre de processus pour un dump non compressé
+        resoudre_libelles (bool) : Deuxième passe pour remplacer les identifiants
+                                   de région/pays/critères par leurs libellés
+
+    Retourne :
+        dict : Listes au format de extraire_donnees_sites (+ Annee_creation, Pays, Id_UNESCO, Id_wikidata)
+        None : Si une erreur se produit
+    """
+    print(f"📦 Ingestion du dump Wikidata {chemin}...")
+    debut_chrono = time.perf_counter()
+
+    try:
+        compresse = chemin.endswith(('.bz2', '.gz'))
+
+        # --- PREMIÈRE PASSE : FILTRAGE DES ENTITÉS P757 ---
+        if processus > 1 and not compresse:
+            taille = os.path.getsize(chemin)
+            bornes = [taille * i // processus for i in range(processus + 1)]
+            with ProcessPoolExecutor(max_workers=processus) as executeur:
+                tranches = executeur.map(traiter_tranche_wikidata,
+                                         [chemin] * processus, bornes[:-1], bornes[1:])
+                enregistrements = [e for tranche in tranches for e in tranche]
+        else:
+            if processus > 1:
+                print("   ⚠️  Dump compressé : lecture par un seul processus")
+            enregistrements = traiter_tranche_wikidata(chemin)
+
+        print(f"   → {len(enregistrements)} entités avec {PROPRIETE_UNESCO}")
+
+        # --- DEUXIÈME PASSE (OPTIONNELLE) : LIBELLÉS ---
+        libelles = {}
+        if resoudre_libelles:
+            identifiants = set()
+            for e in enregistrements:
+                identifiants.update(x for x in (e['Region'], e['Pays']) if x)
+                identifiants.update(e['Type'])
+            libelles = lire_libelles_wikidata(chemin, identifiants)
+            print(f"   → {len(libelles)} libellés résolus sur {len(identifiants)}")
+
+        for e in enregistrements:
+            e['Region'] = libelles.get(e['Region'], e['Region'])
+            e['Pays'] = libelles.get(e['Pays'], e['Pays'])
+            e['Type'] = type_depuis_criteres([libelles.get(c, '') for c in e['Type']])
+
+        # --- MISE AU FORMAT "DICTIONNAIRE DE LISTES" DU SCRAPER ---
+        colonnes = ['Site', 'Region', 'Type', 'Annee', 'Annee_creation', 'Coordonnees_brutes',
+                    'Composantes_brutes', 'Pays', 'Id_UNESCO', 'Id_wikidata']
+        donnees = {colonne: [e[colonne] for e in enregistrements] for colonne in colonnes}
+
+        duree = time.perf_counter() - debut_chrono
+        print(f"✓ {len(enregistrements)} sites extraits en {duree:.1f} s\n")
+        return donnees
+
+    except Exception as e:
+        print(f"✗ Erreur lors de l'ingestion du dump : {e}\n")
+        return None
+
+
+# ============================================================================
+# INGESTION HORS LIGNE - DUMPS HTML WIKIMEDIA ENTERPRISE ET ARCHIVES WARC
+# ============================================================================
+
+# Titres des articles contenant des listes patrimoniales
+MOTIF_TITRES_LISTES = re.compile(r'^Liste (du patrimoine mondial|des monuments historiques)')
+
+# Titres des listes de monuments historiques : tableaux lus par en-tête
+# (extraire_donnees_tableau_monuments), pas par position comme la liste UNESCO
+MOTIF_TITRES_MONUMENTS = re.compile(r'^Liste des monuments historiques')
+
+# Préfixe des URL d'articles (identifiant de page dans l'historique)
+PREFIXE_ARTICLES = "https://fr.wikipedia.org/wiki/"
+
+# Valeurs des champs "name" d'une ligne NDJSON (pré-filtre avant décodage JSON)
+MOTIF_CHAMP_NAME = re.compile(rb'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+# Fonction pour lire en flux les articles d'un dump HTML Wikimedia Enterprise
+def lire_articles_enterprise(chemin, motif=MOTIF_TITRES_LISTES):
+    """
+    Générateur des articles d'un dump Enterprise (archive .tar.gz de fichiers NDJSON)
+
+    L'archive est lue en flux (mode 'r|gz') : un seul article est en mémoire
+    à la fois. Le JSON (qui contient tout le HTML de l'article) n'est décodé
+    que si l'un des champs "name" de la ligne correspond au motif.
+
+    Paramètres :
+        chemin (str) : Chemin de l'archive
+        motif (Pattern) : Expression régulière sur le titre de l'article
+
+    Retourne :
+        generator : Tuples (titre, revision, html)
+    """
+    with tarfile.open(chemin, 'r|gz') as archive:
+        for membre in archive:
+            if not membre.isfile():
+                continue
+            fichier = archive.extractfile(membre)
+
+            for ligne in fichier:
+                noms = (json.loads(b'"' + n + b'"') for n in MOTIF_CHAMP_NAME.findall(ligne))
+                if not any(motif.search(nom) for nom in noms):
+                    continue
+
+                article = json.loads(ligne)
+                titre = article.get('name', '')
+                if not motif.search(titre):
+                    continue
+
+                html = article.get('article_body', {}).get('html', '')
+                revision = article.get('version', {}).get('identifier')
+                yield titre, revision, html
+
+
+# Fonction utilitaire : corps d'une réponse HTTP archivée (dé-découpé et décompressé)
+def corps_reponse_http(contenu):
+    """
+    Extrait le corps d'une réponse HTTP brute telle qu'archivée dans un WARC
+
+    Les en-têtes Transfer-Encoding (chunked) et Content-Encoding (gzip,
+    deflate, br) sont appliqués dans cet ordre, comme le ferait un navigateur.
+    Le format br nécessite le module brotli (pip install brotli).
+
+    Paramètres :
+        contenu (bytes) : Réponse HTTP complète (ligne de statut, en-têtes, corps)
+
+    Retourne :
+        bytes : Corps décodé, ou None si l'encodage n'est pas pris en charge
+    """
+    brut_entetes, _, corps = contenu.partition(b'\r\n\r\n')
+    entetes = {}
+    for ligne in brut_entetes.split(b'\r\n')[1:]:
+        cle, _, valeur = ligne.decode('latin-1').partition(':')
+        entetes[cle.strip().lower()] = valeur.strip().lower()
+
+    # --- TRANSFER-ENCODING : blocs "taille en hexadécimal\r\n données\r\n" ---
+    if 'chunked' in entetes.get('transfer-encoding', ''):
+        morceaux = []
+        position = 0
+        while position < len(corps):
+            fin_ligne = corps.find(b'\r\n', position)
+            if fin_ligne < 0:
+                break
+            taille = int(corps[position:fin_ligne].split(b';')[0].strip() or b'0', 16)
+            if taille == 0:
+                break
+            morceaux.append(corps[fin_ligne + 2:fin_ligne + 2 + taille])
+            position = fin_ligne + 2 + taille + 2
+        corps = b''.join(morceaux)
+
+    # --- CONTENT-ENCODING (plusieurs encodages possibles, appliqués dans l'ordre) ---
+    encodages = [e.strip() for e in entetes.get('content-encoding', '').split(',') if e.strip()]
+    for encodage in reversed(encodages):
+        if encodage in ('gzip', 'x-gzip'):
+            corps = gzip.decompress(corps)
+        elif encodage == 'deflate':
+            # deflate avec en-tête zlib (RFC) ou brut (certains serveurs)
+            try:
+                corps = zlib.decompress(corps)
+            except zlib.error:
+                corps = zlib.decompress(corps, -zlib.MAX_WBITS)
+        elif encodage == 'br':
+            try:
+                import brotli
+            except ImportError:
+                return None
+            corps = brotli.decompress(corps)
+        elif encodage != 'identity':
+            return None
+    return corps
+
+
+# Fonction pour lire en flux les pages HTML d'une archive WARC (.warc ou .warc.gz)
+def lire_articles_warc(chemin, motif=MOTIF_TITRES_LISTES):
+    """
+    Générateur des articles Wikipedia archivés dans un fichier WARC
+
+    Seuls les enregistrements 'response' dont l'URL est un article
+    (/wiki/Titre) correspondant au motif sont retournés. Le corps des
+    autres enregistrements est sauté sans être conservé. Le corps HTTP est
+    dé-découpé et décompressé (voir corps_reponse_http).
+
+    Paramètres :
+        chemin (str) : Chemin de l'archive (.warc ou .warc.gz)
+        motif (Pattern) : Expression régulière sur le titre de l'article
+
+    Retourne :
+        generator : Tuples (titre, revision, html), revision = None (lue dans le HTML)
+    """
+    ouvrir = gzip.open if chemin.endswith('.gz') else open
+    with ouvrir(chemin, 'rb') as flux:
+        while True:
+            # --- EN-TÊTE DE L'ENREGISTREMENT WARC ---
+            ligne = flux.readline()
+            if not ligne:
+                break
+            if not ligne.startswith(b'WARC/'):
+                continue
+
+            entetes = {}
+            for ligne in iter(flux.readline, b''):
+                if ligne in (b'\r\n', b'\n'):
+                    break
+                cle, _, valeur = ligne.decode('utf-8', 'replace').partition(':')
+                entetes[cle.strip().lower()] = valeur.strip()
+
+            longueur = int(entetes.get('content-length', 0))
+            url = entetes.get('warc-target-uri', '')
+            titre = unquote(url.split('/wiki/', 1)[1]).replace('_', ' ') if '/wiki/' in url else ''
+
+            if entetes.get('warc-type') != 'response' or not motif.search(titre):
+                flux.read(longueur)
+                continue
+
+            # --- RÉPONSE HTTP : en-têtes puis corps HTML (éventuellement compressé) ---
+            try:
+                corps = corps_reponse_http(flux.read(longueur))
+            except (ValueError, OSError, EOFError, zlib.error) as e:
+                print(f"   ✗ Réponse illisible pour « {titre} » : {e}")
+                continue
+            if corps is None:
+                print(f"   ⚠️  Encodage non pris en charge pour « {titre} » "
+                      f"(br : pip install brotli)")
+                continue
+            yield titre, None, corps.decode('utf-8', 'replace')
+
+
+# Fonction exécutée par un processus : analyse le HTML d'une page
+def analyser_page_html(page, html, revision=None):
+    """
+    Passe le HTML d'une page dans extraire_tableau_sites puis extraire_donnees_sites
+
+    Les messages des fonctions d'extraction sont masqués (une page parmi
+    des milliers) ; seul le résultat est renvoyé au processus principal.
+
+    Paramètres :
+        page (str) : URL de la page
+        html (str) : HTML de la page
+        revision (int) : Révision connue (None = lue dans le HTML)
+
+    Retourne :
+        dict : {'page', 'revision', 'donnees'} (donnees = None si pas de tableau)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        soup = BeautifulSoup(html, "html.parser")
+        if revision is None:
+            revision = extraire_revision(soup)
+        tableau = extraire_tableau_sites(soup)
+        donnees = extraire_donnees_sites(tableau) if tableau is not None else None
+
+    return {'page': page, 'revision': revision, 'donnees': donnees}
+
+
+# Fonction exécutée par un processus : analyse le HTML d'un article d'un dump
+def analyser_article_html(titre, revision, html):
+    """
+    Analyse un article de dump, identifié par son titre
+
+    - Listes de monuments historiques : analyser_page_monuments (colonnes
+      repérées par en-tête, clé = notice Mérimée, voir cle_monument)
+    - Autres listes : analyser_page_html (tableau de la liste UNESCO)
+
+    Paramètres :
+        titre (str) : Titre de l'article
+        revision (int) : Révision connue (None = lue dans le HTML)
+        html (str) : HTML de l'article
+
+    Retourne :
+        dict : {'page', 'revision', 'donnees'} (donnees = None si pas de tableau)
+    """
+    page = PREFIXE_ARTICLES + titre.replace(' ', '_')
+    if not MOTIF_TITRES_MONUMENTS.match(titre):
+        return analyser_page_html(page, html, revision)
+
+    if revision is None:
+        revision_trouvee = MOTIF_REVISION.search(html)
+        revision = int(revision_trouvee.group(1)) if revision_trouvee else None
+
+    # Un monument cité deux fois sur la page n'est gardé qu'une fois
+    enregistrements = {}
+    for enregistrement in analyser_page_monuments(page, html)['enregistrements']:
+        enregistrement['Id_site'] = cle_monument(enregistrement)
+        enregistrements.setdefault(enregistrement['Id_site'], enregistrement)
+
+    donnees = None
+    if enregistrements:
+        donnees = {colonne: [e[colonne] for e in enregistrements.values()]
+                   for colonne in COLONNES_DONNEES_MONUMENTS}
+    return {'page': page, 'revision': revision, 'donnees': donnees}
+
+
+# Fonction principale : dump HTML / WARC → données de chaque article, analysées en parallèle
+def ingerer_dump_html(chemin, motif=MOTIF_TITRES_LISTES, processus=None, en_attente_max=None):
+    """
+    Analyse en parallèle les articles de listes patrimoniales d'un dump hors ligne
+
+    La lecture de l'archive reste dans le processus principal ; au plus
+    en_attente_max articles sont envoyés aux processus en même temps, ce qui
+    borne la mémoire (l'archive n'est jamais chargée en entier). Chaque
+    processus est recyclé après 1000 articles pour éviter qu'il ne grossisse
+    (les processus sont alors lancés en mode "spawn" : appeler cette fonction
+    depuis un bloc if __name__ == "__main__").
+
+    Paramètres :
+        chemin (str) : Dump Enterprise (.tar.gz) ou archive WARC (.warc / .warc.gz)
+        motif (Pattern) : Expression régulière sur le titre des articles
+        processus (int) : Nombre de processus (None = nombre de cœurs)
+        en_attente_max (int) : Articles en cours au maximum (None = 2 × processus)
+
+    Retourne :
+        list : Résultats de analyser_article_html pour les articles contenant un tableau
+    """
+    print(f"📚 Ingestion du dump HTML {chemin}...")
+    debut_chrono = time.perf_counter()
+
+    processus = processus or os.cpu_count() or 1
+    en_attente_max = en_attente_max or 2 * processus
+
+    if '.warc' in os.path.basename(chemin):
+        articles = lire_articles_warc(chemin, motif)
+    else:
+        articles = lire_articles_enterprise(chemin, motif)
+
+    resultats = []
+    nb_articles = 0
+    titres = {}   # future → titre de l'article (pour signaler les échecs)
+    echecs = []
+
+    # Un article mal formé est compté en échec sans interrompre l'ingestion
+    def recueillir(termines):
+        for future in termines:
+            titre = titres.pop(future)
+            try:
+                resultats.append(future.result())
+            except Exception as e:
+                print(f"   ✗ Article « {titre} » ignoré : {e}")
+                echecs.append(titre)
+
+    try:
+        with ProcessPoolExecutor(max_workers=processus, max_tasks_per_child=1000) as executeur:
+            en_cours = set()
+
+            for titre, revision, html in articles:
+                # File pleine : on attend qu'un article soit terminé avant d'en lire un autre
+                if len(en_cours) >= en_attente_max:
+                    termines, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+                    recueillir(termines)
+
+                future = executeur.submit(analyser_article_html, titre, revision, html)
+                titres[future] = titre
+                en_cours.add(future)
+                nb_articles += 1
+
+            recueillir(wait(en_cours).done)
+
+    except Exception as e:
+        print(f"✗ Erreur lors de l'ingestion du dump HTML : {e}\n")
+
+    resultats = [r for r in resultats if r['donnees'] is not None]
+    nb_sites = sum(len(r['donnees']['Site']) for r in resultats)
+    duree = time.perf_counter() - debut_chrono
+
+    print(f"✓ {nb_articles} articles analysés, {len(resultats)} avec un tableau, "
+          f"{nb_sites} sites ({duree:.1f} s)")
+    if echecs:
+        print(f"✗ {len(echecs)} articles en échec")
+    print()
+    return resultats
+
+
+# ============================================================================
+# PIPELINE ASYNCHRONE - TÉLÉCHARGEMENT, ANALYSE, ENRICHISSEMENT, EXPORT
+# ============================================================================
+
+# Session HTTP propre à chaque thread de téléchargement (connexions persistantes)
+SESSIONS_HTTP = threading.local()
+
+
+# Étape 1 (thread) : téléchargement d'une page
+def etape_telechargement(url, chemin_pack=None):
+    """
+    Télécharge une page avec la session HTTP du thread courant
+
+    Paramètres :
+        url (str) : URL de la page
+        chemin_pack (str) : Fichier pack où archiver le HTML brut (None = pas d'archive)
+
+    Retourne :
+        tuple : (url, html) ou None si le téléchargement a échoué
+    """
+    if not hasattr(SESSIONS_HTTP, 'session'):
+        SESSIONS_HTTP.session = requests.Session()
+    html = recuperer_html(url, HEADERS, SESSIONS_HTTP.session, verbeux=False)
+    if html is None:
+        return None
+
+    if chemin_pack is not None:
+        revision = MOTIF_REVISION.search(html)
+        ajouter_page_pack(chemin_pack, url, int(revision.group(1)) if revision else None, html)
+    return url, html
+
+
+# Étape 2 (processus) : analyse du HTML
+def etape_analyse(url, html):
+    """
+    Extrait les données d'une page (voir analyser_page_html)
+
+    Retourne :
+        dict : {'page', 'revision', 'donnees'} ou None si la page n'a pas de tableau
+    """
+    resultat = analyser_page_html(url, html)
+    return resultat if resultat['donnees'] is not None else None
+
+
+# Étape 3 (processus) : conversion et correction des coordonnées
+def etape_enrichissement(resultat):
+    """
+    Construit le DataFrame d'une page puis convertit et complète ses coordonnées
+
+    Paramètres :
+        resultat (dict) : Sortie de etape_analyse
+
+    Retourne :
+        dict : resultat complété d'une clé 'dataframe'
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataframe = pd.DataFrame(resultat['donnees'])
+        dataframe = convertir_toutes_coordonnees(dataframe)
+        dataframe = corriger_coordonnees_manquantes(dataframe)
+    dataframe['Page'] = resultat['page']
+    resultat['dataframe'] = dataframe
+    return resultat
+
+
+# Fonction générique : fait tourner une étape du pipeline entre deux files
+async def executer_etape(fonction, entree, sortie, nb_travailleurs, executeur, nb_sentinelles_sortie):
+    """
+    Lance nb_travailleurs tâches qui lisent la file d'entrée, appliquent la
+    fonction dans l'exécuteur (thread ou processus) et écrivent dans la file de sortie
+
+    None sert de signal de fin : chaque travailleur s'arrête à la réception
+    d'un None, puis l'étape en envoie un par travailleur de l'étape suivante.
+    L'écriture dans une file pleine bloque le travailleur (contre-pression).
+
+    Paramètres :
+        fonction (callable) : Fonction appliquée à chaque élément (tuple = arguments)
+        entree (Queue) : File d'entrée
+        sortie (Queue) : File de sortie (None pour la dernière étape)
+        nb_travailleurs (int) : Nombre de tâches concurrentes
+        executeur (Executor) : Exécuteur dans lequel la fonction tourne
+        nb_sentinelles_sortie (int) : Nombre de travailleurs de l'étape suivante
+    """
+    boucle = asyncio.get_running_loop()
+
+    async def travailleur():
+        while True:
+            element = await entree.get()
+            if element is None:
+                break
+            arguments = element if isinstance(element, tuple) else (element,)
+            try:
+                resultat = await boucle.run_in_executor(executeur, fonction, *arguments)
+            except Exception as e:
+                nom = getattr(fonction, 'func', fonction).__name__
+                print(f"   ⚠️  Erreur dans l'étape {nom} : {e}")
+                continue
+            if resultat is not None and sortie is not None:
+                await sortie.put(resultat)
+
+    # TaskGroup : si un travailleur échoue, les autres sont annulés
+    async with asyncio.TaskGroup() as groupe:
+        for _ in range(nb_travailleurs):
+            groupe.create_task(travailleur())
+
+    if sortie is not None:
+        for _ in range(nb_sentinelles_sortie):
+            await sortie.put(None)
+
+
+# Fonction principale du pipeline : les étapes tournent en même temps
+async def executer_pipeline(urls, taille_files=4, nb_telechargements=4, processus=None,
+                            chemin_instantanes=FICHIER_INSTANTANES, intervalle_rapport=1.0,
+                            chemin_pack=None):
+    """
+    Télécharge, analyse, enrichit et historise plusieurs pages en parallèle
+
+    Les étapes sont reliées par des files asyncio bornées (taille_files) :
+    si l'analyse prend du retard, les téléchargements s'arrêtent au lieu
+    d'accumuler du HTML en mémoire. Les étapes de calcul (analyse,
+    enrichissement) tournent dans des processus ; l'export dans un unique
+    thread qui possède la connexion SQLite.
+
+    Paramètres :
+        urls (iterable) : URL des pages à traiter
+        taille_files (int) : Nombre maximal d'éléments en attente entre deux étapes
+        nb_telechargements (int) : Téléchargements simultanés
+        processus (int) : Processus pour l'analyse et l'enrichissement (None = nombre de cœurs)
+        chemin_instantanes (str) : Base des instantanés (None = pas d'historisation)
+        intervalle_rapport (float) : Secondes entre deux affichages de la profondeur des files
+        chemin_pack (str) : Fichier pack où archiver le HTML téléchargé (None = pas d'archive)
+
+    Retourne :
+        tuple : (DataFrame de tous les sites avec colonne 'Page', dict de statistiques)
+    """
+    print("🔀 Démarrage du pipeline asynchrone...")
+    debut_chrono = time.perf_counter()
+    processus = processus or os.cpu_count() or 1
+
+    # --- FILES ENTRE LES ÉTAPES ---
+    files = {
+        'urls': asyncio.Queue(maxsize=taille_files),
+        'html': asyncio.Queue(maxsize=taille_files),
+        'pages': asyncio.Queue(maxsize=taille_files),
+        'enrichies': asyncio.Queue(maxsize=taille_files)
+    }
+    profondeur_max = {nom: 0 for nom in files}
+
+    boucle = asyncio.get_running_loop()
+    executeur_threads = ThreadPoolExecutor(max_workers=nb_telechargements)
+    executeur_processus = ProcessPoolExecutor(max_workers=processus)
+    executeur_export = ThreadPoolExecutor(max_workers=1)
+
+    dataframes = []
+    connexion = None
+    if chemin_instantanes is not None:
+        connexion = await boucle.run_in_executor(executeur_export, ouvrir_stock_instantanes,
+                                                 chemin_instantanes)
+
+    # Étape 4 (thread unique) : historisation et accumulation des résultats
+    def etape_export(resultat):
+        if connexion is not None:
+            enregistrer_instantane(connexion, resultat['page'], resultat['donnees'],
+                                   resultat['revision'])
+        dataframes.append(resultat['dataframe'])
+
+    async def alimenter():
+        for url in urls:
+            await files['urls'].put(url)
+        for _ in range(nb_telechargements):
+            await files['urls'].put(None)
+
+    async def surveiller():
+        while True:
+            for nom, file in files.items():
+                profondeur_max[nom] = max(profondeur_max[nom], file.qsize())
+            print("   📈 Files : " + " · ".join(
+                f"{nom} {file.qsize()}/{file.maxsize}" for nom, file in files.items()))
+            await asyncio.sleep(intervalle_rapport)
+
+    surveillance = asyncio.create_task(surveiller())
+    try:
+        # TaskGroup : si une étape échoue, les autres (bloquées sur leur file) sont
+        # annulées avant la fermeture de la connexion et des exécuteurs
+        async with asyncio.TaskGroup() as groupe:
+            groupe.create_task(alimenter())
+            groupe.create_task(executer_etape(
+                functools.partial(etape_telechargement, chemin_pack=chemin_pack),
+                files['urls'], files['html'], nb_telechargements, executeur_threads, processus))
+            groupe.create_task(executer_etape(etape_analyse, files['html'], files['pages'],
+                                              processus, executeur_processus, processus))
+            groupe.create_task(executer_etape(etape_enrichissement, files['pages'], files['enrichies'],
+                                              processus, executeur_processus, 1))
+            groupe.create_task(executer_etape(etape_export, files['enrichies'], None,
+                                              1, executeur_export, 0))
+    finally:
+        surveillance.cancel()
+        await asyncio.gather(surveillance, return_exceptions=True)
+        # L'export en cours (thread unique) se termine avant la fermeture de la connexion
+        if connexion is not None:
+            await boucle.run_in_executor(executeur_export, connexion.close)
+        executeur_threads.shutdown()
+        executeur_processus.shutdown()
+        executeur_export.shutdown()
+
+    dataframe = pd.concat(dataframes, ignore_index=True) if dataframes else pd.DataFrame()
+    statistiques = {
+        'pages': len(dataframes),
+        'sites': len(dataframe),
+        'duree': time.perf_counter() - debut_chrono,
+        'profondeur_max': profondeur_max
+    }
+
+    print(f"✓ Pipeline terminé : {statistiques['pages']} pages, {statistiques['sites']} sites "
+          f"en {statistiques['duree']:.1f} s")
+    print("   → Profondeur maximale des files : " + " · ".join(
+        f"{nom} {profondeur}" for nom, profondeur in profondeur_max.items()) + "\n")
+    return dataframe, statistiques
+
+
+# ============================================================================
+# ARCHIVAGE DES PAGES BRUTES - FICHIER PACK + INDEX DES POSITIONS
+# ============================================================================
+
+# Révision MediaWiki lue directement dans le HTML brut (sans le parser)
+MOTIF_REVISION = re.compile(r'"wgRevisionId"\s*:\s*(\d+)')
+
+# Un seul thread à la fois ajoute une page à un fichier pack
+VERROU_PACK = threading.Lock()
+
+# Packs déjà projetés en mémoire dans ce processus (réutilisés entre deux tâches)
+PACKS_OUVERTS = {}
+
+
+# Fonction pour ajouter une page compressée à la fin d'un fichier pack
+def ajouter_page_pack(chemin_pack, url, revision, html):
+    """
+    Ajoute une page compressée (zlib) à la fin du pack et sa position dans l'index
+
+    Format :
+    - chemin_pack : pages compressées les unes à la suite des autres
+    - chemin_pack + '.idx' : une ligne "url<TAB>revision<TAB>offset<TAB>longueur" par page
+    Les données sont écrites avant la ligne d'index : après une interruption,
+    l'index ne pointe jamais vers une page incomplète.
+
+    Paramètres :
+        chemin_pack (str) : Chemin du fichier pack
+        url (str) : URL de la page
+        revision (int) : Révision de la page (None = inconnue, notée 0)
+        html (str) : HTML de la page
+
+    Retourne :
+        tuple : (offset, longueur) de la page dans le pack
+    """
+    donnees = zlib.compress(html.encode('utf-8'), 6)
+
+    with VERROU_PACK:
+        with open(chemin_pack, 'ab') as pack:
+            offset = pack.seek(0, os.SEEK_END)
+            pack.write(donnees)
+        with open(chemin_pack + '.idx', 'a', encoding='utf-8') as index:
+            index.write(f"{url}\t{revision or 0}\t{offset}\t{len(donnees)}\n")
+
+    return offset, len(donnees)
+
+
+# Fonction pour ouvrir un pack en lecture (projection mémoire + index en dictionnaire)
+def ouvrir_pack(chemin_pack):
+    """
+    Projette le pack en mémoire (mmap) et charge son index
+
+    Paramètres :
+        chemin_pack (str) : Chemin du fichier pack
+
+    Retourne :
+        dict : {'chemin', 'fichier', 'mmap', 'index', 'derniere'} où
+               index = {(url, revision): (offset, longueur)},
+               derniere = {url: révision la plus récente} et
+               mmap = None si le pack est vide
+    """
+    index = {}
+    derniere = {}
+    with open(chemin_pack + '.idx', encoding='utf-8') as fichier_index:
+        for ligne in fichier_index:
+            url, revision, offset, longueur = ligne.rstrip('\n').split('\t')
+            revision = int(revision)
+            index[(url, revision)] = (int(offset), int(longueur))
+            if revision >= derniere.get(url, -1):
+                derniere[url] = revision
+
+    fichier = open(chemin_pack, 'rb')
+    # Un fichier vide ne peut pas être projeté (pack tout juste créé) : lecteur sans projection
+    projection = None
+    if os.fstat(fichier.fileno()).st_size > 0:
+        projection = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return {'chemin': chemin_pack, 'fichier': fichier, 'mmap': projection,
+            'index': index, 'derniere': derniere}
+
+
+# Fonction pour fermer un pack ouvert par ouvrir_pack
+def fermer_pack(pack):
+    """
+    Libère la projection mémoire et le fichier d'un pack
+
+    Paramètres :
+        pack (dict) : Pack ouvert par ouvrir_pack
+    """
+    if pack['mmap'] is not None:
+        pack['mmap'].close()
+    pack['fichier'].close()
+
+
+# Fonction pour obtenir la tranche compressée d'une page, sans copie
+def lire_tranche_pack(pack, url, revision=None):
+    """
+    Retourne une vue (memoryview) sur les octets compressés d'une page
+
+    Accès en O(1) : une recherche dans le dictionnaire d'index puis une
+    tranche de la projection mémoire, quelle que soit la taille du pack.
+
+    Paramètres :
+        pack (dict) : Pack ouvert par ouvrir_pack
+        url (str) : URL de la page
+        revision (int) : Révision voulue (None = la plus récente)
+
+    Retourne :
+        memoryview : Octets compressés de la page
+        None : Si la page n'est pas dans le pack
+    """
+    if revision is None:
+        revision = pack['derniere'].get(url)
+    position = pack['index'].get((url, revision))
+    if position is None or pack['mmap'] is None:
+        return None
+
+    offset, longueur = position
+    return memoryview(pack['mmap'])[offset:offset + longueur]
+
+
+# Fonction pour lire le HTML d'une page archivée
+def lire_html_pack(pack, url, revision=None):
+    """
+    Décompresse une page archivée (zlib lit directement la vue, sans copie intermédiaire)
+
+    Paramètres :
+        pack (dict) : Pack ouvert par ouvrir_pack
+        url (str) : URL de la page
+        revision (int) : Révision voulue (None = la plus récente)
+
+    Retourne :
+        bytes : HTML de la page (BeautifulSoup accepte directement des bytes)
+        None : Si la page n'est pas dans le pack
+    """
+    tranche = lire_tranche_pack(pack, url, revision)
+    if tranche is None:
+        return None
+    try:
+        return zlib.decompress(tranche)
+    finally:
+        tranche.release()
+
+
+# Fonction exécutée par un processus : analyse une page désignée par sa position dans le pack
+def analyser_page_pack(chemin_pack, url, offset, longueur):
+    """
+    Analyse une page archivée ; seuls le chemin et la position sont envoyés au
+    processus, qui projette lui-même le pack en mémoire (une fois par processus)
+
+    Paramètres :
+        chemin_pack (str) : Chemin du fichier pack
+        url (str) : URL de la page
+        offset (int) : Position de la page dans le pack
+        longueur (int) : Taille compressée de la page
+
+    Retourne :
+        dict : {'page', 'revision', 'donnees'} (voir analyser_page_html)
+    """
+    projection = PACKS_OUVERTS.get(chemin_pack)
+    if projection is None or offset + longueur > len(projection):
+        # Le pack a grandi : l'ancienne projection est libérée avant d'en créer une
+        # nouvelle (aucune vue n'est conservée entre deux appels)
+        if projection is not None:
+            projection.close()
+        with open(chemin_pack, 'rb') as fichier:
+            if os.fstat(fichier.fileno()).st_size == 0:
+                PACKS_OUVERTS.pop(chemin_pack, None)
+                raise ValueError(f"Pack vide, page introuvable : {chemin_pack} ({url})")
+            projection = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        PACKS_OUVERTS[chemin_pack] = projection
+
+    with memoryview(projection)[offset:offset + longueur] as tranche:
+        html = zlib.decompress(tranche)
+    return analyser_page_html(url, html)
+
+
+# Fonction pour réanalyser en parallèle la dernière révision de chaque page d'un pack
+def analyser_pack(chemin_pack, processus=None):
+    """
+    Réanalyse les pages archivées (dernière révision de chaque URL) sans réseau
+
+    Paramètres :
+        chemin_pack (str) : Chemin du fichier pack
+        processus (int) : Nombre de processus (None = nombre de cœurs)
+
+    Retourne :
+        list : Résultats de analyser_page_html pour les pages contenant un tableau
+    """
+    print(f"🗃️  Analyse des pages archivées dans {chemin_pack}...")
+
+    pack = ouvrir_pack(chemin_pack)
+    try:
+        taches = [(url, *pack['index'][(url, revision)]) for url, revision in pack['derniere'].items()]
+    finally:
+        fermer_pack(pack)
+
+    with ProcessPoolExecutor(max_workers=processus) as executeur:
+        resultats = list(executeur.map(analyser_page_pack, [chemin_pack] * len(taches),
+                                       *zip(*taches)) if taches else [])
+
+    resultats = [r for r in resultats if r['donnees'] is not None]
+    print(f"✓ {len(taches)} pages analysées, {len(resultats)} avec un tableau\n")
+    return resultats
+
+
+# ============================================================================
+# RÉCONCILIATION DES SITES ENTRE SOURCES ET RÉVISIONS
+# ============================================================================
+
+# Appels de notes et espaces : voir MOTIF_APPELS_NOTES et MOTIF_ESPACES (extraction)
+
+# Mots collés lors de l'extraction (get_text(strip=True) supprime l'espace
+# entre deux balises) : "CathédraleNotre-Dame" → "Cathédrale Notre-Dame"
+MOTIF_MOTS_COLLES = re.compile(r'(?<=[a-zà-ÿ])(?=[A-ZÀ-Þ])')
+
+# Nombre de trigrammes les plus rares utilisés pour chercher les candidats d'un nom
+NB_TRIGRAMMES_RARES = 4
+
+# Nombre maximal de candidats notés par nom (les plus proches en trigrammes communs)
+NB_CANDIDATS_MAX = 10
+
+
+# Fonction pour nettoyer un nom de site extrait d'une cellule
+def normaliser_nom_site(nom):
+    """
+    Nettoie un nom de site : forme Unicode NFC, appels de notes supprimés,
+    espaces réparées (insécables, mots collés entre deux balises)
+
+    Paramètres :
+        nom (str) : Nom brut (ex: "CathédraleNotre-Dame de Chartres[1]")
+
+    Retourne :
+        str : Nom nettoyé (ex: "Cathédrale Notre-Dame de Chartres")
+    """
+    if not isinstance(nom, str):
+        return ''
+    nom = unicodedata.normalize('NFC', nom)
+    nom = MOTIF_APPELS_NOTES.sub('', nom)
+    nom = MOTIF_MOTS_COLLES.sub(' ', nom)
+    return MOTIF_ESPACES.sub(' ', nom).strip()
+
+
+# Fonction utilitaire : trigrammes d'une clé de comparaison
+def trigrammes(cle):
+    """
+    Découpe une clé en trigrammes (avec une espace de bordure de chaque côté)
+
+    Paramètres :
+        cle (str) : Clé normalisée (ex: "chartres")
+
+    Retourne :
+        set : Trigrammes (ex: {' ch', 'cha', 'har', ...})
+    """
+    cle = f" {cle} "
+    return {cle[i:i + 3] for i in range(len(cle) - 2)}
+
+
+# Fonction utilitaire : identifiant stable d'un site à partir de son nom
+def identifiant_site(cle):
+    """
+    Calcule un identifiant stable à partir de la clé de comparaison du nom
+
+    Paramètres :
+        cle (str) : Clé normalisée
+
+    Retourne :
+        str : Identifiant (ex: 'site-3f2a9c0d1b7e')
+    """
+    return 'site-' + hashlib.sha1(cle.encode('utf-8')).hexdigest()[:12]
+
+
+# Fonction principale : associe chaque nouveau site à un site de référence
+def reconcilier_sites(reference, nouveaux, seuil=90):
+    """
+    Attribue à chaque site de 'nouveaux' l'identifiant du site correspondant
+    dans 'reference' (autre source ou révision précédente)
+
+    Étapes :
+    1. Clé de comparaison (nom nettoyé, sans accents ni ponctuation, minuscules)
+       → les clés identiques sont associées directement (dictionnaire)
+    2. Blocage : pour les autres, seuls les sites de référence partageant l'un
+       des trigrammes les plus rares de la clé sont candidats (index inversé),
+       ce qui évite de comparer toutes les paires
+    3. Score de similarité (rapidfuzz, en C) sur les meilleurs candidats ;
+       les paires au-dessus du seuil sont attribuées de la meilleure à la moins
+       bonne, chaque identifiant de référence n'étant repris qu'une fois
+    L'association est donc un-pour-un et ne dépend pas de l'ordre des lignes :
+    un nom exact garde son identifiant même si une variante approchée le suit.
+    Les sites sans correspondant reçoivent un identifiant calculé depuis leur nom.
+
+    Paramètres :
+        reference (DataFrame) : Sites connus (colonne Site, et Id_site si déjà attribués)
+        nouveaux (DataFrame) : Sites à réconcilier (colonne Site)
+        seuil (float) : Score minimal (0-100) pour associer deux noms
+
+    Retourne :
+        DataFrame : Copie de 'nouveaux' avec colonnes Id_site et Score_reconciliation
+    """
+    print("🔗 Réconciliation des sites...")
+
+    try:
+        from rapidfuzz import fuzz
+        similarite = fuzz.token_sort_ratio
+    except ImportError:
+        # Repli sur la librairie standard (beaucoup plus lent)
+        print("   ⚠️  rapidfuzz absent (pip install rapidfuzz) : utilisation de difflib")
+        import difflib
+        def similarite(a, b):
+            return 100 * difflib.SequenceMatcher(None, a, b).ratio()
+
+    resultat = nouveaux.copy()
+
+    # --- CLÉS DE COMPARAISON ---
+    cles_ref = [normaliser_nom_lieu(normaliser_nom_site(n)) for n in reference['Site']]
+    if 'Id_site' in reference:
+        ids_ref = [str(i) for i in reference['Id_site']]
+    else:
+        ids_ref = [identifiant_site(c) for c in cles_ref]
+    cles_nouv = [normaliser_nom_lieu(normaliser_nom_site(n)) for n in resultat['Site']]
+
+    ids = [None] * len(cles_nouv)
+    scores = [None] * len(cles_nouv)
+    utilises = set()   # positions de référence déjà attribuées
+    nb_exacts = 0
+    nb_approches = 0
+
+    # --- ÉTAPE 1 : CORRESPONDANCES EXACTES (avant toute correspondance approchée) ---
+    par_cle = {}
+    for position, cle in enumerate(cles_ref):
+        par_cle.setdefault(cle, []).append(position)
+
+    for position_nouv, cle in enumerate(cles_nouv):
+        libres = [p for p in par_cle.get(cle, []) if p not in utilises]
+        if libres:
+            utilises.add(libres[0])
+            ids[position_nouv] = ids_ref[libres[0]]
+            scores[position_nouv] = 100.0
+            nb_exacts += 1
+
+    # --- INDEX INVERSÉ DES TRIGRAMMES (sites de référence encore libres) ---
+    index_trigrammes = {}
+    for position, cle in enumerate(cles_ref):
+        if position in utilises:
+            continue
+        for trigramme in trigrammes(cle):
+            index_trigrammes.setdefault(trigramme, []).append(position)
+
+    paires = []
+    for position_nouv, cle in enumerate(cles_nouv):
+        if ids[position_nouv] is not None:
+            continue
+
+        # --- ÉTAPE 2 : CANDIDATS PAR LES TRIGRAMMES LES PLUS RARES ---
+        connus = [t for t in trigrammes(cle) if t in index_trigrammes]
+        connus.sort(key=lambda t: len(index_trigrammes[t]))
+        communs = {}
+        for trigramme in connus[:NB_TRIGRAMMES_RARES]:
+            for candidat in index_trigrammes[trigramme]:
+                communs[candidat] = communs.get(candidat, 0) + 1
+        candidats = sorted(communs, key=communs.get, reverse=True)[:NB_CANDIDATS_MAX]
+
+        # --- ÉTAPE 3 : SCORE DE SIMILARITÉ ---
+        for candidat in candidats:
+            score = similarite(cle, cles_ref[candidat])
+            if score >= seuil:
+                paires.append((float(score), cle, ids_ref[candidat], position_nouv, candidat))
+
+    # Meilleures paires d'abord (égalités départagées par les noms, pas par l'ordre des lignes)
+    paires.sort(key=lambda paire: (-paire[0], paire[1], paire[2]))
+    for score, _, id_ref, position_nouv, candidat in paires:
+        if ids[position_nouv] is None and candidat not in utilises:
+            utilises.add(candidat)
+            ids[position_nouv] = id_ref
+            scores[position_nouv] = score
+            nb_approches += 1
+
+    # Sites sans correspondant : identifiant calculé depuis le nom, salé par un
+    # compteur s'il est déjà pris (ex: nouveau site portant l'ancien nom d'un site renommé)
+    pris = set(ids_ref) | {i for i in ids if i is not None}
+    for position_nouv, cle in enumerate(cles_nouv):
+        if ids[position_nouv] is None:
+            identifiant = identifiant_site(cle)
+            numero = 2
+            while identifiant in pris:
+                identifiant = identifiant_site(f"{cle}\x1f{numero}")
+                numero += 1
+            pris.add(identifiant)
+            ids[position_nouv] = identifiant
+
+    resultat['Id_site'] = ids
+    resultat['Score_reconciliation'] = scores
+
+    nb_nouveaux = len(resultat) - nb_exacts - nb_approches
+    print(f"✓ {nb_exacts} correspondances exactes, {nb_approches} approchées, "
+          f"{nb_nouveaux} nouveaux sites\n")
+    return resultat
+
+
+# ============================================================================
+# COUCHE DE DENSITÉ MULTI-RÉSOLUTION (HEXAGONES PAR NIVEAU DE ZOOM)
+# ============================================================================
+
+# Niveaux de zoom couverts par la couche de densité (au-delà : marqueurs individuels)
+ZOOM_MIN_DENSITE = 3
+ZOOM_MAX_DENSITE = 10
+
+# Rayon d'un hexagone à l'écran, en pixels (identique à tous les niveaux de zoom)
+RAYON_HEXAGONE_PIXELS = 20
+
+# Nombre maximal de marqueurs créés à la fois en zoom rapproché (zone visible)
+NB_MARQUEURS_VISIBLES_MAX = 2000
+
+
+# Fonction pour regrouper des points en hexagones (calcul vectorisé NumPy)
+def agreger_hexagones(latitudes, longitudes, zoom, rayon_pixels=RAYON_HEXAGONE_PIXELS):
+    """
+    Compte les points par hexagone pour un niveau de zoom donné
+
+    Les coordonnées sont projetées en Mercator (projection des fonds de carte) :
+    les hexagones ont donc la même forme et la même taille à l'écran partout.
+    Un seul passage sur les points : conversion en coordonnées hexagonales
+    (axiales), arrondi, puis np.unique pour compter.
+
+    Paramètres :
+        latitudes (array) : Latitudes en degrés
+        longitudes (array) : Longitudes en degrés
+        zoom (int) : Niveau de zoom Leaflet
+        rayon_pixels (float) : Rayon d'un hexagone à l'écran
+
+    Retourne :
+        tuple : (q, r, comptes) — coordonnées axiales des hexagones non vides et nombre de points
+    """
+    # Taille d'un hexagone en "degrés Mercator" pour ce niveau de zoom (tuiles de 256 px)
+    taille = rayon_pixels * 360 / (256 * 2 ** zoom)
+
+    x = np.asarray(longitudes, dtype=float)
+    y = np.degrees(np.log(np.tan(np.pi / 4 + np.radians(np.asarray(latitudes, dtype=float)) / 2)))
+
+    # Coordonnées axiales fractionnaires (hexagones "pointe en haut")
+    q = (np.sqrt(3) / 3 * x - y / 3) / taille
+    r = (2 / 3 * y) / taille
+
+    # Arrondi au centre d'hexagone le plus proche (coordonnées cubiques)
+    s = -q - r
+    q_arrondi, r_arrondi, s_arrondi = np.round(q), np.round(r), np.round(s)
+    ecart_q = np.abs(q_arrondi - q)
+    ecart_r = np.abs(r_arrondi - r)
+    ecart_s = np.abs(s_arrondi - s)
+    corrige_q = (ecart_q > ecart_r) & (ecart_q > ecart_s)
+    corrige_r = ~corrige_q & (ecart_r > ecart_s)
+    q_arrondi[corrige_q] = -r_arrondi[corrige_q] - s_arrondi[corrige_q]
+    r_arrondi[corrige_r] = -q_arrondi[corrige_r] - s_arrondi[corrige_r]
+
+    cases, comptes = np.unique(np.stack([q_arrondi, r_arrondi], axis=1).astype(np.int64),
+                               axis=0, return_counts=True)
+    return cases[:, 0], cases[:, 1], comptes
+
+
+# Fonction pour ajouter la couche de densité (un niveau d'hexagones par zoom) à une carte
+def ajouter_couche_densite(carte, dataframe, groupe_marqueurs=None, sites=None,
+                           zoom_min=ZOOM_MIN_DENSITE, zoom_max=ZOOM_MAX_DENSITE):
+    """
+    Ajoute une couche d'hexagones précalculée pour chaque niveau de zoom
+
+    Seuls le centre (en coordonnées Mercator) et le nombre de sites de chaque
+    hexagone sont écrits dans le HTML ; le navigateur construit les polygones
+    (rendu canvas) du seul niveau correspondant au zoom courant, soit quelques
+    centaines d'hexagones au lieu de dizaines de milliers de marqueurs.
+    Au-delà de zoom_max, les hexagones disparaissent, le groupe de
+    marqueurs (s'il est fourni) est affiché, et les sites fournis en JSON
+    situés dans la zone visible deviennent des marqueurs (au plus
+    NB_MARQUEURS_VISIBLES_MAX, reconstruits à chaque déplacement).
+
+    Paramètres :
+        carte (Map) : Carte Folium
+        dataframe (DataFrame) : Sites avec colonnes Latitude et Longitude
+        groupe_marqueurs (FeatureGroup) : Groupe affiché seulement au-delà de zoom_max
+        sites (list) : Sites au format de donnees_marqueur, affichés au-delà de zoom_max
+        zoom_min (int) : Premier niveau de zoom précalculé
+        zoom_max (int) : Dernier niveau de zoom précalculé
+
+    Retourne :
+        int : Nombre total d'hexagones (tous niveaux confondus)
+    """
+    from branca.element import Template
+
+    points = dataframe.dropna(subset=['Latitude', 'Longitude'])
+    if len(points) == 0:
+        return 0
+    latitudes = points['Latitude'].to_numpy(dtype=float)
+    longitudes = points['Longitude'].to_numpy(dtype=float)
+
+    niveaux = []
+    nb_hexagones = 0
+
+    for zoom in range(zoom_min, zoom_max + 1):
+        q, r, comptes = agreger_hexagones(latitudes, longitudes, zoom)
+        nb_hexagones += len(comptes)
+
+        # Centres des hexagones en coordonnées Mercator (inverse de agreger_hexagones)
+        taille = RAYON_HEXAGONE_PIXELS * 360 / (256 * 2 ** zoom)
+        centres_x = np.round(taille * np.sqrt(3) * (q + r / 2), 5)
+        centres_y = np.round(taille * 1.5 * r, 5)
+
+        # Le premier niveau couvre aussi les zooms plus éloignés
+        niveaux.append({
+            'debut': zoom if zoom > zoom_min else 0,
+            'fin': zoom + 1,
+            'taille': taille,
+            'max': int(comptes.max()),
+            'cases': np.stack([centres_x, centres_y, comptes], axis=1).tolist()
+        })
+
+    donnees_niveaux = json.dumps(niveaux, separators=(',', ':'))
+    # "</" échappé : un nom contenant "</script>" ne peut pas fermer la balise
+    donnees_sites = json.dumps(sites or [], ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    nom_marqueurs = groupe_marqueurs.get_name() if groupe_marqueurs is not None else 'null'
+
+    # --- SCRIPT : CONSTRUIT ET AFFICHE LA COUCHE DU NIVEAU DE ZOOM COURANT ---
+    script = folium.MacroElement()
+    script._template = Template(f"""
+        {{% macro script(this, kwargs) %}}
+        {{{{ this.script_marqueurs }}}}
+        (function () {{
+            var carte = {carte.get_name()};
+            var marqueurs = {nom_marqueurs};
+            var niveaux = {donnees_niveaux};
+            var sites = {{{{ this.sites }}}};
+            var coucheSites = L.layerGroup();
+            var rendu = L.canvas();
+
+            // Jaune (peu de sites) → rouge (beaucoup), échelle logarithmique
+            function couleur(nb, max) {{
+                var t = Math.log(1 + nb) / Math.log(1 + Math.max(max, 1));
+                return 'hsl(' + (55 - 55 * t) + ', 100%, ' + (65 - 25 * t) + '%)';
+            }}
+
+            function construireCouche(niveau) {{
+                var groupe = L.featureGroup();
+                niveau.cases.forEach(function (c) {{
+                    var sommets = [];
+                    for (var k = 0; k < 6; k++) {{
+                        var angle = Math.PI / 180 * (30 + 60 * k);
+                        var x = c[0] + niveau.taille * Math.cos(angle);
+                        var y = c[1] + niveau.taille * Math.sin(angle);
+                        var lat = 180 / Math.PI * (2 * Math.atan(Math.exp(y * Math.PI / 180)) - Math.PI / 2);
+                        sommets.push([lat, x]);
+                    }}
+                    L.polygon(sommets, {{
+                        renderer: rendu, color: '#ffffff', weight: 0.5,
+                        fillColor: couleur(c[2], niveau.max), fillOpacity: 0.6
+                    }}).bindTooltip('Sites : ' + c[2]).addTo(groupe);
+                }});
+                return groupe;
+            }}
+
+            function afficherNiveau() {{
+                var zoom = carte.getZoom();
+                niveaux.forEach(function (niveau) {{
+                    var visible = zoom >= niveau.debut && zoom < niveau.fin;
+                    if (visible) {{
+                        // Couche construite au premier affichage seulement
+                        niveau.couche = niveau.couche || construireCouche(niveau);
+                        if (!carte.hasLayer(niveau.couche)) {{ carte.addLayer(niveau.couche); }}
+                    }} else if (niveau.couche && carte.hasLayer(niveau.couche)) {{
+                        carte.removeLayer(niveau.couche);
+                    }}
+                }});
+                if (marqueurs) {{
+                    var proche = zoom > {zoom_max};
+                    if (proche && !carte.hasLayer(marqueurs)) {{ carte.addLayer(marqueurs); }}
+                    if (!proche && carte.hasLayer(marqueurs)) {{ carte.removeLayer(marqueurs); }}
+                }}
+            }}
+
+            // Marqueurs des seuls sites de la zone visible (élargie de 20 %)
+            function afficherSitesVisibles() {{
+                coucheSites.clearLayers();
+                if (carte.getZoom() <= {zoom_max}) {{
+                    carte.removeLayer(coucheSites);
+                    return;
+                }}
+                var zone = carte.getBounds().pad(0.2);
+                var nb = 0;
+                for (var i = 0; i < sites.length && nb < {NB_MARQUEURS_VISIBLES_MAX}; i++) {{
+                    if (zone.contains([sites[i][0], sites[i][1]])) {{
+                        marqueurSite(sites[i]).addTo(coucheSites);
+                        nb++;
+                    }}
+                }}
+                if (!carte.hasLayer(coucheSites)) {{ carte.addLayer(coucheSites); }}
+            }}
+
+            carte.on('zoomend', afficherNiveau);
+            carte.on('moveend', afficherSitesVisibles);
+            afficherNiveau();
+            afficherSitesVisibles();
+        }})();
+        {{% endmacro %}}
+    """)
+    # Données et fonctions des marqueurs insérées par Jinja (pas dans la f-string)
+    script.sites = donnees_sites
+    script.script_marqueurs = SCRIPT_MARQUEURS_TERRITOIRE
+    carte.add_child(script)
+
+    return nb_hexagones
+
+
+# ============================================================================
+# EXPLORATION DES LISTES MULTI-PAGES (MONUMENTS HISTORIQUES)
+# ============================================================================
+
+# Page d'index des listes de monuments historiques (liens vers les départements)
+URL_INDEX_MONUMENTS = "https://fr.wikipedia.org/wiki/Liste_des_monuments_historiques_par_département_français"
+
+# Liens suivis depuis l'index : listes par département, puis par commune
+MOTIF_PAGES_MONUMENTS = re.compile(r'^/wiki/Liste_des_monuments_historiques_[^:#?]+$')
+
+# Colonne d'un tableau → champ de l'enregistrement (mots-clés cherchés dans l'en-tête,
+# dans cet ordre : "Date de protection" est une date, "Protection" seul un statut)
+COLONNES_MONUMENTS = {
+    'Site': ('monument', 'édifice', 'désignation', 'nom'),
+    'Commune': ('commune', 'localité', 'ville'),
+    'Adresse': ('adresse', 'lieu', 'emplacement'),
+    'Coordonnees_brutes': ('coordonnées', 'coord'),
+    'Date': ('date',),
+    'Protection': ('protection', 'classement', 'inscription'),
+    'Notice': ('notice', 'mérimée', 'référence', 'ref')
+}
+
+# Colonnes des données de monuments (format de extraire_donnees_sites + champs propres) ;
+# Region reste vide : les pages de listes ne donnent que la commune
+COLONNES_DONNEES_MONUMENTS = ['Site', 'Region', 'Commune', 'Type', 'Annee', 'Coordonnees_brutes',
+                              'Adresse', 'Protection', 'Notice', 'Page', 'Id_site']
+
+# Identifiant de la base Mérimée (ex: PA00088801) : clé de dédoublonnage la plus fiable
+MOTIF_NOTICE_MERIMEE = re.compile(r'\b(?:PA|IA|EA)\d{8}\b')
+
+
+# Fonction utilitaire : lignes d'un tableau avec les cellules fusionnées (rowspan) recopiées
+def lignes_avec_fusions(tableau):
+    """
+    Générateur des lignes d'un tableau, chaque cellule fusionnée verticalement
+    (rowspan) étant répétée sur toutes les lignes qu'elle couvre
+
+    Paramètres :
+        tableau (Tag) : Élément <table>
+
+    Retourne :
+        generator : Listes de cellules (<td>/<th>), une par ligne
+    """
+    en_cours = {}   # colonne → [cellule, nombre de lignes restantes]
+
+    for ligne in tableau.find_all('tr'):
+        cellules = iter(ligne.find_all(['td', 'th'], recursive=False))
+        rangee = []
+        colonne = 0
+
+        while True:
+            if colonne in en_cours:
+                cellule, restant = en_cours[colonne]
+                if restant <= 1:
+                    del en_cours[colonne]
+                else:
+                    en_cours[colonne][1] -= 1
+            else:
+                cellule = next(cellules, None)
+                if cellule is None:
+                    break
+                fusion = cellule.get('rowspan', '1')
+                fusion = int(fusion) if str(fusion).isdigit() else 1
+                if fusion > 1:
+                    en_cours[colonne] = [cellule, fusion - 1]
+            rangee.append(cellule)
+            colonne += 1
+
+        yield rangee
+
+
+# Fonction pour extraire les lignes de n'importe quel tableau de monuments (colonnes lues dans l'en-tête)
+def extraire_donnees_tableau_monuments(tableau):
+    """
+    Extrait les monuments d'un tableau en repérant les colonnes par leur en-tête
+    (l'ordre des colonnes varie d'une page à l'autre)
+
+    Paramètres :
+        tableau (Tag) : Élément <table class="wikitable">
+
+    Retourne :
+        list : Enregistrements (dict) ; liste vide si le tableau n'a pas de colonne "monument"
+    """
+    lignes = lignes_avec_fusions(tableau)
+    entete = next(lignes, [])
+
+    # --- CORRESPONDANCE COLONNE → CHAMP ---
+    positions = {}
+    for position, cellule in enumerate(entete):
+        texte = cellule.get_text(" ", strip=True).lower()
+        for champ, mots_cles in COLONNES_MONUMENTS.items():
+            if champ not in positions and any(mot in texte for mot in mots_cles):
+                positions[champ] = position
+                break
+    if 'Site' not in positions:
+        return []
+
+    enregistrements = []
+    for cellules in lignes:
+        if len(cellules) <= positions['Site'] or cellules[positions['Site']].name == 'th':
+            continue
+
+        valeurs = {}
+        for champ, position in positions.items():
+            cellule = cellules[position] if position < len(cellules) else None
+            if cellule is None:
+                valeurs[champ] = ''
+            elif champ == 'Coordonnees_brutes':
+                # Lien {{coord}} en priorité, sinon coordonnées décimales, sinon texte brut
+                lien = (cellule.find('a', {'class': 'external text'})
+                        or cellule.find('span', {'class': 'geo-dec'}))
+                valeurs[champ] = texte_cellule(lien or cellule)
+            else:
+                valeurs[champ] = texte_cellule(cellule)
+
+        site = normaliser_nom_site(valeurs.get('Site', ''))
+        if not site:
+            continue
+
+        # Année de la colonne Date, sinon cherchée dans le texte de la protection
+        annee = (re.findall(r'\d{4}', valeurs.get('Date', ''))
+                 or re.findall(r'\d{4}', valeurs.get('Protection', '')))
+        notice = MOTIF_NOTICE_MERIMEE.findall(valeurs.get('Notice', '') or valeurs.get('Site', ''))
+
+        enregistrements.append({
+            'Site': site,
+            'Region': None,
+            'Commune': sys.intern(valeurs.get('Commune', '')),
+            'Type': 'Culturel',
+            'Annee': int(annee[0]) if annee else None,
+            'Coordonnees_brutes': valeurs.get('Coordonnees_brutes', ''),
+            'Adresse': valeurs.get('Adresse', ''),
+            'Protection': valeurs.get('Protection', ''),
+            'Notice': notice[0] if notice else None
+        })
+
+    return enregistrements
+
+
+# Fonction exécutée par un processus : liens vers les sous-pages + monuments de tous les tableaux
+def analyser_page_monuments(url, html):
+    """
+    Analyse une page de liste : découvre les sous-pages et lit chaque wikitable
+
+    Paramètres :
+        url (str) : URL de la page
+        html (str) : HTML de la page
+
+    Retourne :
+        dict : {'page', 'liens' (URL des sous-pages), 'enregistrements'}
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    liens = set()
+    for lien in soup.find_all('a', href=True):
+        href = lien['href'].split('#')[0]
+        if MOTIF_PAGES_MONUMENTS.match(href):
+            liens.add(urljoin(url, href))
+
+    enregistrements = []
+    for tableau in soup.find_all('table', {'class': 'wikitable'}):
+        for enregistrement in extraire_donnees_tableau_monuments(tableau):
+            enregistrement['Page'] = url
+            enregistrements.append(enregistrement)
+
+    return {'page': url, 'liens': sorted(liens), 'enregistrements': enregistrements}
+
+
+# Fonction utilitaire : clé de dédoublonnage d'un monument
+def cle_monument(enregistrement):
+    """
+    Clé d'un monument : notice Mérimée si connue, sinon nom + commune + coordonnées
+
+    Paramètres :
+        enregistrement (dict) : Enregistrement produit par extraire_donnees_tableau_monuments
+
+    Retourne :
+        str : Clé de dédoublonnage
+    """
+    if enregistrement['Notice']:
+        return enregistrement['Notice']
+    return '|'.join((normaliser_nom_lieu(enregistrement['Site']),
+                     normaliser_nom_lieu(enregistrement['Commune']),
+                     enregistrement['Coordonnees_brutes']))
+
+
+# Fonction utilitaire : mémoire maximale utilisée par le processus (en Mo)
+def memoire_maximale_mo(enfants=False):
+    """
+    Pic de mémoire résidente (Linux/macOS uniquement)
+
+    Paramètres :
+        enfants (bool) : False = processus courant ; True = plus gros des processus
+                         enfants terminés (à appeler après l'arrêt du pool de processus)
+
+    Retourne :
+        float : Mémoire en Mo, ou None si la mesure n'est pas disponible
+    """
+    try:
+        import resource
+        qui = resource.RUSAGE_CHILDREN if enfants else resource.RUSAGE_SELF
+        pic = resource.getrusage(qui).ru_maxrss
+        # Linux : kilo-octets ; macOS : octets
+        return pic / 1024 if sys.platform != 'darwin' else pic / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+# Fonction principale : explore l'index, ses sous-pages et tous leurs tableaux
+def explorer_monuments(url_index=URL_INDEX_MONUMENTS, profondeur_max=2, nb_telechargements=4,
+                       processus=None, taille_lot=32, chemin_pack=None):
+    """
+    Parcourt en largeur les listes de monuments historiques à partir de l'index
+
+    - Profondeur 1 : pages par département, profondeur 2 : pages par commune
+    - Pages traitées par lots de taille_lot : téléchargement en threads puis
+      analyse en processus ; seul un lot de HTML est en mémoire à la fois
+    - Chaque page n'est visitée qu'une fois, chaque monument n'est gardé qu'une
+      fois (voir cle_monument)
+
+    Paramètres :
+        url_index (str) : Page de départ
+        profondeur_max (int) : Nombre de niveaux de liens suivis
+        nb_telechargements (int) : Téléchargements simultanés
+        processus (int) : Processus d'analyse (None = nombre de cœurs)
+        taille_lot (int) : Pages téléchargées puis analysées ensemble
+        chemin_pack (str) : Fichier pack où archiver le HTML (None = pas d'archive)
+
+    Retourne :
+        tuple : (données au format de extraire_donnees_sites + Commune, Adresse,
+                 Protection, Notice, Page, Id_site ; dict de statistiques)
+    """
+    print(f"🕸️  Exploration des listes depuis {url_index}...")
+    debut_chrono = time.perf_counter()
+
+    visitees = {url_index}
+    niveau = [url_index]
+    cles_vues = set()
+    enregistrements = []
+    nb_pages = 0
+    nb_lignes = 0
+    telechargement = functools.partial(etape_telechargement, chemin_pack=chemin_pack)
+
+    with ThreadPoolExecutor(max_workers=nb_telechargements) as executeur_threads, \
+         ProcessPoolExecutor(max_workers=processus) as executeur_processus:
+
+        for profondeur in range(profondeur_max + 1):
+            niveau_suivant = []
+
+            for debut in range(0, len(niveau), taille_lot):
+                lot = niveau[debut:debut + taille_lot]
+                pages = [p for p in executeur_threads.map(telechargement, lot) if p is not None]
+                resultats = executeur_processus.map(analyser_page_monuments, *zip(*pages)) if pages else []
+
+                for resultat in resultats:
+                    nb_pages += 1
+                    nb_lignes += len(resultat['enregistrements'])
+
+                    # --- DÉDOUBLONNAGE ---
+                    for enregistrement in resultat['enregistrements']:
+                        cle = cle_monument(enregistrement)
+                        if cle not in cles_vues:
+                            cles_vues.add(cle)
+                            enregistrement['Id_site'] = cle
+                            enregistrements.append(enregistrement)
+
+                    # --- SOUS-PAGES À VISITER AU NIVEAU SUIVANT ---
+                    if profondeur < profondeur_max:
+                        for lien in resultat['liens']:
+                            if lien not in visitees:
+                                visitees.add(lien)
+                                niveau_suivant.append(lien)
+
+                duree = time.perf_counter() - debut_chrono
+                print(f"   → {nb_pages} pages, {len(enregistrements)} monuments "
+                      f"({nb_pages / duree:.1f} pages/s)")
+
+            niveau = niveau_suivant
+            if not niveau:
+                break
+
+    duree = time.perf_counter() - debut_chrono
+    statistiques = {
+        'pages': nb_pages,
+        'lignes': nb_lignes,
+        'monuments': len(enregistrements),
+        'doublons': nb_lignes - len(enregistrements),
+        'duree': duree,
+        'pages_par_seconde': nb_pages / duree if duree else 0,
+        'lignes_par_seconde': nb_lignes / duree if duree else 0,
+        # Processus principal, plus gros processus d'analyse (pool arrêté à ce stade),
+        # et borne haute de l'ensemble : principal + chaque processus à son pic
+        'memoire_max_mo': memoire_maximale_mo(),
+        'memoire_max_processus_mo': memoire_maximale_mo(enfants=True)
+    }
+    if statistiques['memoire_max_mo'] is not None:
+        statistiques['memoire_totale_max_mo'] = (statistiques['memoire_max_mo']
+                                                 + (processus or os.cpu_count() or 1)
+                                                 * statistiques['memoire_max_processus_mo'])
+
+    print(f"✓ {statistiques['monuments']} monuments ({statistiques['doublons']} doublons écartés) "
+          f"sur {nb_pages} pages en {duree:.1f} s")
+    print(f"   → Débit : {statistiques['pages_par_seconde']:.1f} pages/s, "
+          f"{statistiques['lignes_par_seconde']:.0f} lignes/s")
+    if statistiques['memoire_max_mo'] is not None:
+        print(f"   → Mémoire maximale : {statistiques['memoire_max_mo']:.0f} Mo (principal), "
+              f"{statistiques['memoire_max_processus_mo']:.0f} Mo (par processus d'analyse), "
+              f"≤ {statistiques['memoire_totale_max_mo']:.0f} Mo au total\n")
+
+    donnees = {colonne: [e[colonne] for e in enregistrements] for colonne in COLONNES_DONNEES_MONUMENTS}
+    return donnees, statistiques
+
+
+# ============================================================================
+# CONSTRUCTION INCRÉMENTALE DES ARTEFACTS PUBLIÉS
+# ============================================================================
+
+# Dossier servi tel quel par l'application Vite (copié dans dist/ par "vite build")
+DOSSIER_PUBLICATION = "public"
+
+# Manifeste lu par l'application : nom logique → fichier à empreinte
+FICHIER_MANIFESTE = "manifeste_artefacts.json"
+
+# Préfixe des URL publiées (option "base" de vite.config.js)
+BASE_PUBLICATION = "/wikiscrap/"
+
+# À incrémenter quand le code de rendu change : force la régénération de tous les artefacts
+VERSION_RENDU = 1
+
+
+# Fonction de rendu de chaque artefact : (nom logique, extension, colonnes lues, paramètres de rendu)
+def lister_artefacts(parametres_carte=None):
+    """
+    Décrit les artefacts publiés et la fonction qui produit chacun d'eux
+
+    Les colonnes lues limitent l'empreinte d'entrée : renommer un site ne
+    régénère pas les graphiques, qui ne dépendent que des comptages.
+
+    Paramètres :
+        parametres_carte (dict) : Options passées à creer_carte_interactive (ex: {'densite': True})
+
+    Retourne :
+        list : Tuples (nom, extension, colonnes (None = toutes), paramètres,
+                       fonction(dataframe, resume, composantes, chemin))
+    """
+    parametres_carte = dict(parametres_carte or {})
+    return [
+        ('carte_unesco_france', '.html', None, parametres_carte,
+         lambda df, resume, composantes, chemin: creer_carte_interactive(
+             df, chemin, resume, composantes, ouvrir_navigateur=False, **parametres_carte)),
+        ('graphique_regions', '.png', ('Region',), {},
+         lambda df, resume, composantes, chemin: creer_graphique_regions(df, resume, chemin)),
+        ('graphique_decennies', '.png', ('Annee',), {},
+         lambda df, resume, composantes, chemin: creer_graphique_decennies(df, resume, chemin)),
+        ('graphique_types', '.png', ('Type',), {},
+         lambda df, resume, composantes, chemin: creer_graphique_types(df, resume, chemin))
+    ]
+
+
+# Fonction pour calculer l'empreinte d'un jeu de données (contenu de toutes les colonnes)
+def empreinte_dataframe(dataframe):
+    """
+    Empreinte SHA-256 du contenu d'un DataFrame (noms de colonnes, index et valeurs)
+
+    Paramètres :
+        dataframe (DataFrame) : Données à empreinter
+
+    Retourne :
+        str : Empreinte hexadécimale
+    """
+    empreinte = hashlib.sha256()
+    empreinte.update(json.dumps(list(map(str, dataframe.columns))).encode('utf-8'))
+    empreinte.update(pd.util.hash_pandas_object(dataframe.index).to_numpy().tobytes())
+
+    for colonne in dataframe.columns:
+        serie = dataframe[colonne]
+        try:
+            valeurs = pd.util.hash_pandas_object(serie, index=False)
+        except TypeError:
+            # Colonnes de listes (ex: Composantes_brutes) : empreinte de leur représentation
+            valeurs = pd.util.hash_pandas_object(serie.map(repr), index=False)
+        empreinte.update(valeurs.to_numpy().tobytes())
+
+    return empreinte.hexdigest()
+
+
+# Fonction pour calculer l'empreinte du contenu d'un fichier
+def empreinte_fichier(chemin, taille_bloc=1 << 20):
+    """
+    Empreinte SHA-256 d'un fichier, lu par blocs
+
+    Paramètres :
+        chemin (str) : Fichier à lire
+        taille_bloc (int) : Taille des blocs lus
+
+    Retourne :
+        str : Empreinte hexadécimale
+    """
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+# Fonction pour lire le manifeste d'une publication précédente
+def lire_manifeste(dossier=DOSSIER_PUBLICATION):
+    """
+    Lit le manifeste des artefacts déjà publiés
+
+    Paramètres :
+        dossier (str) : Dossier de publication
+
+    Retourne :
+        dict : Manifeste ({'artefacts': {}} si absent ou illisible)
+    """
+    chemin = os.path.join(dossier, FICHIER_MANIFESTE)
+    try:
+        with open(chemin, encoding='utf-8') as fichier:
+            manifeste = json.load(fichier)
+        manifeste.setdefault('artefacts', {})
+        return manifeste
+    except FileNotFoundError:
+        return {'artefacts': {}}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Manifeste illisible ({e}) : tous les artefacts seront régénérés")
+        return {'artefacts': {}}
+
+
+# Fonction utilitaire : entrée du manifeste encore valable (artefact à ne pas régénérer)
+def artefact_a_jour(ancien, nom, empreinte_entree, dossier, forcer=False):
+    """
+    Indique si un artefact publié correspond encore à ses entrées
+
+    Paramètres :
+        ancien (dict) : Manifeste précédent (voir lire_manifeste)
+        nom (str) : Nom logique de l'artefact
+        empreinte_entree (str) : Empreinte des entrées actuelles
+        dossier (str) : Dossier de publication
+        forcer (bool) : True = jamais à jour
+
+    Retourne :
+        dict : Entrée précédente du manifeste si l'artefact est à jour, sinon None
+    """
+    precedent = ancien['artefacts'].get(nom)
+    if (not forcer and precedent is not None and precedent.get('entree') == empreinte_entree
+            and os.path.exists(os.path.join(dossier, precedent['fichier']))):
+        return precedent
+    return None
+
+
+# Fonction utilitaire : renomme un rendu selon l'empreinte de son contenu
+def publier_fichier_empreinte(dossier, nom, extension, chemin_temporaire, precedent=None):
+    """
+    Renomme un fichier rendu en nom.<empreinte du contenu>.extension et
+    supprime la version précédente si son nom a changé
+
+    Paramètres :
+        dossier (str) : Dossier de publication
+        nom (str) : Nom logique de l'artefact
+        extension (str) : Extension du fichier (ex: '.html')
+        chemin_temporaire (str) : Fichier rendu
+        precedent (dict) : Entrée précédente du manifeste (None si aucune)
+
+    Retourne :
+        tuple : (nom du fichier publié, empreinte du contenu)
+    """
+    empreinte_contenu = empreinte_fichier(chemin_temporaire)
+    fichier = f"{nom}.{empreinte_contenu[:10]}{extension}"
+    os.replace(chemin_temporaire, os.path.join(dossier, fichier))
+
+    if precedent is not None and precedent['fichier'] != fichier:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(dossier, precedent['fichier']))
+    return fichier, empreinte_contenu
+
+
+# Fonction utilitaire : écrit le manifeste s'il a changé (écriture atomique)
+def ecrire_manifeste(dossier, manifeste, ancien):
+    """
+    Réécrit FICHIER_MANIFESTE seulement s'il diffère du précédent (sinon le dossier reste intact)
+
+    Paramètres :
+        dossier (str) : Dossier de publication
+        manifeste (dict) : Nouveau manifeste
+        ancien (dict) : Manifeste précédent
+    """
+    if manifeste == {cle: ancien.get(cle) for cle in manifeste}:
+        return
+    chemin_manifeste = os.path.join(dossier, FICHIER_MANIFESTE)
+    with open(chemin_manifeste + '.tmp', 'w', encoding='utf-8') as fichier:
+        json.dump(manifeste, fichier, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(chemin_manifeste + '.tmp', chemin_manifeste)
+
+
+# Fonction utilitaire : écrit un fichier texte seulement si son contenu change
+def ecrire_si_modifie(chemin, contenu):
+    """
+    Écrit contenu dans chemin, sauf si le fichier contient déjà exactement ce texte
+
+    Paramètres :
+        chemin (str) : Fichier à écrire
+        contenu (str) : Texte voulu
+    """
+    try:
+        with open(chemin, encoding='utf-8') as fichier:
+            if fichier.read() == contenu:
+                return
+    except FileNotFoundError:
+        pass
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        fichier.write(contenu)
+
+
+# Fonction principale : ne régénère que les artefacts dont les entrées ont changé
+def construire_artefacts(dataframe, dossier=DOSSIER_PUBLICATION, parametres_carte=None, forcer=False):
+    """
+    Construit les artefacts publiés (carte, graphiques) de façon incrémentale
+
+    - L'empreinte d'entrée de chaque artefact combine les colonnes qu'il lit,
+      ses paramètres de rendu et VERSION_RENDU ; si elle n'a pas changé et que le fichier existe,
+      l'artefact est conservé tel quel
+    - Les fichiers portent l'empreinte de leur contenu (ex: graphique_types.1a2b3c4d5e.png) :
+      ils peuvent être mis en cache indéfiniment par le navigateur
+    - Le manifeste (FICHIER_MANIFESTE) associe chaque nom logique à son URL
+    - Aucune fenêtre ni navigateur n'est ouvert (traitement par lots)
+
+    Paramètres :
+        dataframe (DataFrame) : Sites avec colonnes Latitude et Longitude
+        dossier (str) : Dossier de publication
+        parametres_carte (dict) : Options passées à creer_carte_interactive
+        forcer (bool) : Régénère tous les artefacts
+
+    Retourne :
+        dict : Manifeste écrit
+    """
+    print(f"📦 Construction des artefacts dans {dossier}/...")
+    debut_chrono = time.perf_counter()
+    os.makedirs(dossier, exist_ok=True)
+
+    ancien = lire_manifeste(dossier)
+    empreinte_donnees = empreinte_dataframe(dataframe)
+    empreintes_colonnes = {None: empreinte_donnees}
+    artefacts = {}
+    resume = None
+    composantes = None
+    nb_regeneres = 0
+
+    for nom, extension, colonnes, parametres, rendre in lister_artefacts(parametres_carte):
+        if colonnes not in empreintes_colonnes:
+            empreintes_colonnes[colonnes] = empreinte_dataframe(dataframe[list(colonnes)])
+        empreinte_entree = hashlib.sha256(json.dumps(
+            {'donnees': empreintes_colonnes[colonnes], 'artefact': nom, 'parametres': parametres,
+             'version': VERSION_RENDU},
+            sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        # --- ARTEFACT À JOUR : RIEN À FAIRE ---
+        a_jour = artefact_a_jour(ancien, nom, empreinte_entree, dossier, forcer)
+        if a_jour is not None:
+            artefacts[nom] = a_jour
+            print(f"   ✓ {nom} à jour ({a_jour['fichier']})")
+            continue
+        precedent = ancien['artefacts'].get(nom)
+
+        # --- RENDU DANS UN FICHIER TEMPORAIRE ---
+        # Résumé et composantes ne sont calculés que si un artefact doit être refait
+        if resume is None:
+            resume = calculer_resume(dataframe)
+            composantes = extraire_composantes(dataframe)
+
+        chemin_temporaire = os.path.join(dossier, f".{nom}.tmp{extension}")
+        rendre(dataframe, resume, composantes, chemin_temporaire)
+        if not os.path.exists(chemin_temporaire):
+            print(f"   ✗ {nom} non généré : version précédente conservée")
+            if precedent is not None:
+                artefacts[nom] = precedent
+            continue
+
+        # --- RENOMMAGE SELON L'EMPREINTE DU CONTENU ---
+        fichier, empreinte_contenu = publier_fichier_empreinte(dossier, nom, extension,
+                                                               chemin_temporaire, precedent)
+        artefacts[nom] = {
+            'fichier': fichier,
+            'url': BASE_PUBLICATION + fichier,
+            'entree': empreinte_entree,
+            'contenu': empreinte_contenu,
+            'octets': os.path.getsize(os.path.join(dossier, fichier))
+        }
+        nb_regeneres += 1
+        print(f"   → {nom} régénéré ({fichier})")
+
+    manifeste = {
+        'base': BASE_PUBLICATION,
+        'donnees': empreinte_donnees,
+        'version_rendu': VERSION_RENDU,
+        'artefacts': artefacts
+    }
+    ecrire_manifeste(dossier, manifeste, ancien)
+
+    print(f"✓ {nb_regeneres} artefact(s) régénéré(s), {len(artefacts) - nb_regeneres} à jour "
+          f"en {time.perf_counter() - debut_chrono:.2f} s\n")
+    return manifeste
+
+
+# ============================================================================
+# CARTES PAR TERRITOIRE - GÉNÉRATION PARALLÈLE
+# ============================================================================
+
+# Dossier des cartes par territoire (une page par région / département + index)
+DOSSIER_CARTES_TERRITOIRES = os.path.join(DOSSIER_PUBLICATION, "cartes")
+
+# Sous-dossier des ressources statiques partagées par toutes les cartes
+DOSSIER_RESSOURCES = "ressources"
+
+# Script partagé : crée les marqueurs et leurs popups à partir des données JSON de la page
+# (même rendu que creer_popup_html, sans un objet folium.Marker par site)
+SCRIPT_MARQUEURS_TERRITOIRE = """// Généré par unescowik.py : marqueurs des cartes par territoire
+function echapperHtml(texte) {
+    return String(texte).replace(/[&<>"']/g, function (c) {
+        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+    });
+}
+
+function popupSite(s) {
+    var ligne = function (icone, libelle, valeur) {
+        return '<p style="margin: 5px 0; color: #555; font-size: 13px;">'
+            + '<i class="fa ' + icone + '" style="color: ' + s[6] + '; margin-right: 5px;"></i>'
+            + '<strong>' + libelle + ':</strong> ' + echapperHtml(valeur) + '</p>';
+    };
+    return '<div style="font-family: \\'Segoe UI\\', Tahoma, sans-serif; width: 250px;">'
+        + '<h4 style="color: ' + s[6] + '; margin: 0 0 10px 0; font-size: 16px; '
+        + 'border-bottom: 2px solid ' + s[6] + '; padding-bottom: 5px;">'
+        + '<i class="fa ' + s[7] + '" style="margin-right: 8px;"></i>' + echapperHtml(s[2]) + '</h4>'
+        + ligne('fa-map-pin', 'Région', s[3])
+        + ligne('fa-tag', 'Type', s[4])
+        + ligne('fa-calendar', 'Inscrit en', s[5] === null ? 'N/A' : s[5])
+        + '</div>';
+}
+
+// s : [latitude, longitude, site, région, type, année, couleur, icône] (voir donnees_marqueur)
+function marqueurSite(s) {
+    return L.marker([s[0], s[1]], {
+        icon: L.AwesomeMarkers.icon({
+            markerColor: 'white', iconColor: s[6], icon: s[7], prefix: 'fa',
+            extraClasses: 'fa-rotate-0'
+        })
+    }).bindPopup(function () { return popupSite(s); }, {maxWidth: 300})
+      .bindTooltip('<b>' + echapperHtml(s[2]) + '</b>');
+}
+
+function ajouterSitesTerritoire(carte, sites) {
+    var limites = [];
+    sites.forEach(function (s) {
+        marqueurSite(s).addTo(carte);
+        limites.push([s[0], s[1]]);
+    });
+    if (limites.length > 0) { carte.fitBounds(limites, {padding: [30, 30], maxZoom: 12}); }
+}
+"""
+
+# Modèle Jinja du script de chaque carte, compilé une fois par processus
+MODELE_MARQUEURS_TERRITOIRE = None
+
+
+# Fonction utilitaire : données JSON d'un marqueur (lues par marqueurSite côté navigateur)
+def donnees_marqueur(lat, lon, site, region, type_site, annee, config):
+    """
+    Représentation compacte d'un site pour le script SCRIPT_MARQUEURS_TERRITOIRE
+
+    Paramètres :
+        lat, lon (float) : Coordonnées du site
+        site, region, type_site (str) : Champs affichés dans la popup
+        annee (float) : Année d'inscription (NaN/None = inconnue)
+        config (dict) : Couleur et icône (voir obtenir_configuration_type)
+
+    Retourne :
+        list : [latitude, longitude, site, région, type, année, couleur, icône]
+    """
+    return [round(float(lat), 6), round(float(lon), 6), site, region, type_site,
+            int(annee) if pd.notna(annee) else None, config['color'], config['icon']]
+
+
+# Fonction pour rassembler les ressources statiques (JS/CSS) en un seul exemplaire local
+def preparer_ressources_statiques(dossier=DOSSIER_CARTES_TERRITOIRES, telecharger=True):
+    """
+    Copie une seule fois les bibliothèques JS/CSS de Folium dans dossier/ressources/
+
+    Toutes les cartes y font référence au lieu de recharger les CDN. Les url(...)
+    relatives des feuilles de style (polices, images) sont réécrites en URL
+    absolues vers le CDN d'origine. Une ressource impossible à télécharger
+    reste servie par son CDN.
+
+    Paramètres :
+        dossier (str) : Dossier des cartes
+        telecharger (bool) : False = aucun accès réseau (seules les copies déjà présentes servent)
+
+    Retourne :
+        dict : URL du CDN → chemin relatif local
+    """
+    from folium import plugins
+
+    dossier_ressources = os.path.join(dossier, DOSSIER_RESSOURCES)
+    os.makedirs(dossier_ressources, exist_ok=True)
+
+    # Script des marqueurs (réécrit seulement s'il a changé)
+    ecrire_si_modifie(os.path.join(dossier_ressources, 'marqueurs_territoire.js'),
+                      SCRIPT_MARQUEURS_TERRITOIRE)
+
+    urls = [url for _, url in (folium.Map.default_js + folium.Map.default_css
+                               + plugins.Fullscreen.default_js + plugins.Fullscreen.default_css)]
+    correspondances = {}
+    session = None
+
+    for url in urls:
+        nom = url.rsplit('/', 1)[-1]
+        chemin = os.path.join(dossier_ressources, nom)
+
+        if not os.path.exists(chemin):
+            if not telecharger:
+                continue
+            session = session or requests.Session()
+            try:
+                reponse = session.get(url, headers=HEADERS, timeout=30)
+                reponse.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"   ⚠️  {nom} non téléchargé ({e}) : CDN conservé")
+                continue
+
+            contenu = reponse.text
+            if nom.endswith('.css'):
+                contenu = re.sub(r'url\((["\']?)(?!data:|https?:|//)([^)"\']+)\1\)',
+                                 lambda m: f'url({m.group(1)}{urljoin(url, m.group(2))}{m.group(1)})',
+                                 contenu)
+            with open(chemin, 'w', encoding='utf-8') as fichier:
+                fichier.write(contenu)
+
+        correspondances[url] = f"{DOSSIER_RESSOURCES}/{nom}"
+
+    print(f"   → {len(correspondances)}/{len(urls)} ressources servies localement")
+    return correspondances
+
+
+# Fonction exécutée par un processus : rendu de la carte d'un territoire
+def rendre_carte_territoire(titre, sites, chemin, ressources):
+    """
+    Génère la carte d'un territoire : marqueurs créés dans le navigateur à
+    partir des données JSON, ressources statiques partagées
+
+    Paramètres :
+        titre (str) : Nom du territoire
+        sites (list) : Listes [latitude, longitude, site, région, type, année, couleur, icône]
+        chemin (str) : Fichier HTML à écrire
+        ressources (dict) : Correspondances CDN → local (voir preparer_ressources_statiques)
+
+    Retourne :
+        str : Chemin écrit, ou None en cas d'erreur
+    """
+    global MODELE_MARQUEURS_TERRITOIRE
+
+    try:
+        from folium import plugins
+        from branca.element import Template
+
+        if MODELE_MARQUEURS_TERRITOIRE is None:
+            MODELE_MARQUEURS_TERRITOIRE = Template("""
+                {% macro script(this, kwargs) %}
+                ajouterSitesTerritoire({{ this._parent.get_name() }}, {{ this.sites }});
+                {% endmacro %}
+            """)
+
+        carte = folium.Map(location=[46.6, 2.5], zoom_start=6, tiles='CartoDB positron',
+                           control_scale=True)
+        carte.get_root().title = f"Sites UNESCO - {titre}"
+        carte.get_root().header.add_child(folium.Element(
+            f'<script src="{DOSSIER_RESSOURCES}/marqueurs_territoire.js"></script>'))
+
+        marqueurs = folium.MacroElement()
+        marqueurs._template = MODELE_MARQUEURS_TERRITOIRE
+        marqueurs.sites = json.dumps(sites, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        carte.add_child(marqueurs)
+
+        plugins.Fullscreen(position='topleft', title='Plein écran',
+                           title_cancel='Quitter le plein écran',
+                           force_separate_button=True).add_to(carte)
+
+        html = carte.get_root().render()
+        for url, chemin_local in ressources.items():
+            html = html.replace(url, chemin_local)
+
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write(html)
+        return chemin
+
+    except Exception as e:
+        print(f"✗ Erreur lors de la création de la carte {titre} : {e}")
+        return None
+
+
+# Fonction pour écrire la page d'index des cartes par territoire
+def ecrire_index_territoires(dossier, colonne, artefacts):
+    """
+    Écrit dossier/index.html : un lien par carte avec son nombre de sites
+
+    Paramètres :
+        dossier (str) : Dossier des cartes
+        colonne (str) : Colonne de partition (titre de la page)
+        artefacts (dict) : Entrées du manifeste (titre, fichier, nb_sites)
+    """
+    import html as module_html
+
+    lignes = [
+        f'<li><a href="{module_html.escape(entree["fichier"])}">{module_html.escape(entree["titre"])}</a>'
+        f' <span>({entree["nb_sites"]} sites)</span></li>'
+        for entree in sorted(artefacts.values(), key=lambda e: normaliser_nom_lieu(e['titre']))
+    ]
+    page = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>Sites UNESCO par {module_html.escape(colonne)}</title>
+<style>
+    body {{ font-family: 'Segoe UI', Tahoma, sans-serif; margin: 40px; color: #333; }}
+    h1 {{ font-size: 22px; border-bottom: 2px solid #3498db; padding-bottom: 8px; }}
+    ul {{ columns: 3; list-style: none; padding: 0; }}
+    li {{ margin: 4px 0; }}
+    a {{ color: #3498db; text-decoration: none; }}
+    span {{ color: #95a5a6; font-size: 13px; }}
+</style>
+</head>
+<body>
+<h1>Sites UNESCO par {module_html.escape(colonne)} ({len(artefacts)} cartes)</h1>
+<ul>
+{chr(10).join(lignes)}
+</ul>
+</body>
+</html>
+"""
+    ecrire_si_modifie(os.path.join(dossier, 'index.html'), page)
+
+
+# Fonction principale : une carte par valeur d'une colonne, rendues en parallèle
+def generer_cartes_territoires(dataframe, colonne='Region', dossier=DOSSIER_CARTES_TERRITOIRES,
+                               processus=None, telecharger_ressources=True, forcer=False):
+    """
+    Génère une carte par territoire (valeur de colonne) et une page d'index
+
+    - Partition du DataFrame par colonne, lignes converties avec itertuples
+    - Rendu des cartes dans un pool de processus ; chaque carte ne contient que
+      les données JSON de ses sites, le script et les bibliothèques sont partagés
+      (dossier ressources/)
+    - Construction incrémentale comme construire_artefacts : une carte dont les
+      données n'ont pas changé n'est pas régénérée ; fichiers nommés selon
+      l'empreinte de leur contenu, manifeste dans le dossier des cartes
+
+    Paramètres :
+        dataframe (DataFrame) : Sites avec colonnes Latitude, Longitude, Site, Region, Type, Annee
+        colonne (str) : Colonne de partition (ex: 'Region', 'Departement')
+        dossier (str) : Dossier de sortie
+        processus (int) : Processus de rendu (None = nombre de cœurs)
+        telecharger_ressources (bool) : Autorise le téléchargement des bibliothèques JS/CSS
+        forcer (bool) : Régénère toutes les cartes
+
+    Retourne :
+        dict : Manifeste écrit, ou None en cas d'erreur
+    """
+    print(f"🗺️  Génération des cartes par {colonne}...")
+    debut_chrono = time.perf_counter()
+
+    if colonne not in dataframe:
+        print(f"✗ Colonne {colonne} absente des données\n")
+        return None
+
+    os.makedirs(dossier, exist_ok=True)
+    ressources = preparer_ressources_statiques(dossier, telecharger_ressources)
+    ancien = lire_manifeste(dossier)
+
+    colonnes = ['Latitude', 'Longitude', 'Site', 'Region', 'Type', 'Annee']
+    df_cartes = dataframe.dropna(subset=['Latitude', 'Longitude'])
+    configurations = {}
+    artefacts = {}
+    a_rendre = []
+
+    for valeur, groupe in df_cartes.groupby(colonne, sort=True):
+        titre = str(valeur)
+        # Suffixe tiré du titre exact : "Île-de-France" et "Ile de France" (ou deux
+        # titres sans lettres latines) ne partagent jamais le même fichier
+        nom = ('carte_' + (normaliser_nom_lieu(titre).replace(' ', '_') or 'sans_nom')
+               + '_' + hashlib.sha1(titre.encode('utf-8')).hexdigest()[:6])
+        empreinte_entree = hashlib.sha256(json.dumps(
+            {'donnees': empreinte_dataframe(groupe[colonnes]), 'titre': titre,
+             'ressources': ressources, 'script': SCRIPT_MARQUEURS_TERRITOIRE,
+             'version': VERSION_RENDU},
+            sort_keys=True).encode('utf-8')).hexdigest()
+
+        a_jour = artefact_a_jour(ancien, nom, empreinte_entree, dossier, forcer)
+        if a_jour is not None:
+            artefacts[nom] = a_jour
+            continue
+        precedent = ancien['artefacts'].get(nom)
+
+        # --- LIGNES → DONNÉES JSON DE LA CARTE ---
+        sites = []
+        for lat, lon, site, region, type_site, annee in groupe[colonnes].itertuples(index=False, name=None):
+            if not verifier_coordonnees_france(lat, lon):
+                continue
+            if type_site not in configurations:
+                configurations[type_site] = obtenir_configuration_type(type_site)
+            config = configurations[type_site]
+            sites.append(donnees_marqueur(lat, lon, site, region, type_site, annee, config))
+
+        a_rendre.append((nom, titre, sites, empreinte_entree, precedent))
+
+    # --- RENDU PARALLÈLE ---
+    if a_rendre:
+        with ProcessPoolExecutor(max_workers=processus) as executeur:
+            travaux = {
+                executeur.submit(rendre_carte_territoire, titre, sites,
+                                 os.path.join(dossier, f".{nom}.tmp.html"), ressources):
+                (nom, titre, sites, empreinte_entree, precedent)
+                for nom, titre, sites, empreinte_entree, precedent in a_rendre
+            }
+            for travail in as_completed(travaux):
+                nom, titre, sites, empreinte_entree, precedent = travaux[travail]
+                chemin_temporaire = travail.result()
+                if chemin_temporaire is None:
+                    if precedent is not None:
+                        artefacts[nom] = precedent
+                    continue
+
+                fichier, empreinte_contenu = publier_fichier_empreinte(dossier, nom, '.html',
+                                                                       chemin_temporaire, precedent)
+
+                artefacts[nom] = {
+                    'titre': titre,
+                    'fichier': fichier,
+                    'entree': empreinte_entree,
+                    'contenu': empreinte_contenu,
+                    'nb_sites': len(sites)
+                }
+
+    # Cartes de territoires disparus : supprimées
+    for nom, entree in ancien['artefacts'].items():
+        if nom not in artefacts:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(dossier, entree['fichier']))
+
+    ecrire_index_territoires(dossier, colonne, artefacts)
+
+    manifeste = {'colonne': colonne, 'version_rendu': VERSION_RENDU, 'artefacts': artefacts}
+    ecrire_manifeste(dossier, manifeste, ancien)
+
+    print(f"✓ {len(a_rendre)} carte(s) générée(s), {len(artefacts) - len(a_rendre)} à jour "
+          f"en {time.perf_counter() - debut_chrono:.2f} s → {os.path.join(dossier, 'index.html')}\n")
+    return manifeste
+
+
+# ============================================================================
+# SERVEUR SIMULÉ ET TEST DE CHARGE DU TÉLÉCHARGEMENT
+# ============================================================================
+
+# Pannes injectées par défaut par le serveur simulé (probabilités par requête)
+SCENARIO_SIMULATION = {
+    'latence_ms': 50,        # Latence moyenne avant la réponse (tirage exponentiel)
+    'proba_429': 0.05,       # Trop de requêtes (avec Retry-After)
+    'proba_503': 0.05,       # Service indisponible (avec Retry-After)
+    'retry_after': 0.2,      # Valeur de l'en-tête Retry-After, en secondes
+    'proba_lent': 0.05,      # Corps envoyé lentement (Content-Length connu, écrit par paquets de 4 Ko)
+    'debit_lent': 64 * 1024, # Débit des corps lents, en octets par seconde
+    'proba_coupure': 0.02    # Connexion fermée au milieu du corps
+}
+
+
+# Fonction pour charger les pages enregistrées servies par le serveur simulé
+def charger_pages_enregistrees(source):
+    """
+    Charge des pages enregistrées, indexées par chemin d'URL
+
+    Paramètres :
+        source (str) : Dossier de fichiers .html (servis sous /wiki/<nom du fichier>)
+                       ou fichier pack (dernière révision de chaque URL, voir ajouter_page_pack)
+
+    Retourne :
+        dict : {chemin d'URL: HTML en bytes}
+    """
+    pages = {}
+
+    if os.path.isdir(source):
+        for nom in sorted(os.listdir(source)):
+            if nom.endswith('.html'):
+                with open(os.path.join(source, nom), 'rb') as fichier:
+                    pages['/wiki/' + nom[:-len('.html')]] = fichier.read()
+    else:
+        pack = ouvrir_pack(source)
+        try:
+            for url in pack['derniere']:
+                pages[urlparse(url).path] = lire_html_pack(pack, url)
+        finally:
+            fermer_pack(pack)
+
+    print(f"✓ {len(pages)} pages enregistrées chargées depuis {source}")
+    return pages
+
+
+# Gestionnaire HTTP du serveur simulé : pages enregistrées + pannes injectées
+class GestionnaireSimulation(BaseHTTPRequestHandler):
+    """
+    Sert les pages enregistrées en injectant latence, réponses 429/503,
+    corps lents et coupures de connexion selon le scénario (voir SCENARIO_SIMULATION)
+    """
+
+    # Connexions persistantes, comme un vrai serveur
+    protocol_version = 'HTTP/1.1'
+
+    # Renseignés par demarrer_serveur_simulation
+    pages = {}
+    scenario = SCENARIO_SIMULATION
+
+    def log_message(self, format, *args):
+        # Pas de ligne de journal par requête (le test de charge en envoie des milliers)
+        pass
+
+    def envoyer_erreur(self, code):
+        corps = f"Erreur simulée {code}".encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        if code in (429, 503):
+            self.send_header('Retry-After', str(self.scenario['retry_after']))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        scenario = self.scenario
+        corps = self.pages.get(urlparse(self.path).path)
+        if corps is None:
+            self.envoyer_erreur(404)
+            return
+
+        # --- LATENCE ---
+        if scenario['latence_ms'] > 0:
+            time.sleep(random.expovariate(1000 / scenario['latence_ms']))
+
+        # --- RÉPONSES D'ERREUR TEMPORAIRE ---
+        tirage = random.random()
+        if tirage < scenario['proba_429']:
+            self.envoyer_erreur(429)
+            return
+        if tirage < scenario['proba_429'] + scenario['proba_503']:
+            self.envoyer_erreur(503)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+
+        # --- COUPURE AU MILIEU DU CORPS ---
+        if random.random() < scenario['proba_coupure']:
+            self.wfile.write(corps[:len(corps) // 2])
+            self.close_connection = True
+            return
+
+        # --- CORPS LENT : PAQUETS DE 4 Ko AU DÉBIT DU SCÉNARIO ---
+        if random.random() < scenario['proba_lent']:
+            taille_paquet = 4096
+            for debut in range(0, len(corps), taille_paquet):
+                self.wfile.write(corps[debut:debut + taille_paquet])
+                self.wfile.flush()
+                time.sleep(taille_paquet / scenario['debit_lent'])
+            return
+
+        self.wfile.write(corps)
+
+
+# Fonction pour démarrer le serveur simulé dans un thread (non bloquant)
+def demarrer_serveur_simulation(source, hote='127.0.0.1', port=0, **scenario):
+    """
+    Démarre le serveur simulé en arrière-plan
+
+    Paramètres :
+        source (str) : Dossier ou pack de pages enregistrées (voir charger_pages_enregistrees)
+        hote (str) : Adresse d'écoute
+        port (int) : Port d'écoute (0 = port libre choisi par le système)
+        **scenario : Valeurs remplaçant celles de SCENARIO_SIMULATION (ex: proba_429=0.2)
+
+    Retourne :
+        ThreadingHTTPServer : Serveur démarré (adresse dans server_address,
+                              arrêt avec shutdown() puis server_close())
+    """
+    inconnus = set(scenario) - set(SCENARIO_SIMULATION)
+    if inconnus:
+        raise ValueError(f"Paramètres de scénario inconnus : {', '.join(sorted(inconnus))}")
+
+    # Classe dédiée : plusieurs serveurs simulés peuvent tourner avec des scénarios différents
+    gestionnaire = type('GestionnaireSimulationConfigure', (GestionnaireSimulation,), {
+        'pages': charger_pages_enregistrees(source),
+        'scenario': dict(SCENARIO_SIMULATION, **scenario)
+    })
+    serveur = ThreadingHTTPServer((hote, port), gestionnaire)
+    serveur.daemon_threads = True
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+
+    hote, port = serveur.server_address[:2]
+    print(f"✓ Serveur simulé disponible sur http://{hote}:{port}/wiki/...")
+    return serveur
+
+
+# Fonction pour mesurer débit, latences et nouvelles tentatives du téléchargement
+def tester_charge_recuperation(urls, concurrence=8, nb_requetes=500,
+                               tentatives=NB_TENTATIVES_MAX, delai=10):
+    """
+    Télécharge des pages en boucle fermée (concurrence threads, chacun avec sa
+    session) avec recuperer_html et mesure le comportement de bout en bout
+
+    La latence d'un téléchargement inclut ses nouvelles tentatives et leurs attentes.
+
+    Paramètres :
+        urls (list) : URL téléchargées à tour de rôle
+        concurrence (int) : Téléchargements simultanés
+        nb_requetes (int) : Nombre total de téléchargements
+        tentatives (int) : Essais maximum par téléchargement (voir recuperer_html)
+        delai (float) : Délai maximal de recuperer_html, en secondes
+
+    Retourne :
+        dict : Débit (req/s), p50/p95/p99/max en millisecondes, taux de succès,
+               taux de nouvelles tentatives et causes d'échec ; None si urls est vide
+    """
+    if not urls:
+        print("✗ Aucune URL à télécharger (source sans pages ?)\n")
+        return None
+
+    print(f"⏱️  Test de charge du téléchargement : {nb_requetes} requêtes, concurrence {concurrence}")
+
+    sessions = threading.local()
+
+    def telecharger(numero):
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        statistiques = {}
+        debut = time.perf_counter()
+        html = recuperer_html(urls[numero % len(urls)], HEADERS, sessions.session,
+                              verbeux=False, tentatives=tentatives, delai=delai,
+                              statistiques=statistiques)
+        return (time.perf_counter() - debut) * 1000, html is not None, statistiques
+
+    # Messages d'erreur de recuperer_html masqués pendant la mesure (redirection
+    # unique, partagée par tous les threads)
+    debut = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), \
+         ThreadPoolExecutor(max_workers=concurrence) as executeur:
+        resultats = list(executeur.map(telecharger, range(nb_requetes)))
+    duree = time.perf_counter() - debut
+
+    latences = sorted(latence for latence, succes, _ in resultats if succes)
+    causes = {}
+    for _, _, statistiques in resultats:
+        for cle, valeur in statistiques.items():
+            causes[cle] = causes.get(cle, 0) + valeur
+    nb_tentatives = causes.pop('tentatives', 0)
+    nb_reessais = causes.pop('reessais', 0)
+
+    rapport = {
+        'requetes': nb_requetes,
+        'succes': len(latences),
+        'duree': duree,
+        'req_par_seconde': nb_requetes / duree if duree else 0,
+        'p50_ms': percentile(latences, 50),
+        'p95_ms': percentile(latences, 95),
+        'p99_ms': percentile(latences, 99),
+        'max_ms': latences[-1] if latences else None,
+        'tentatives': nb_tentatives,
+        'reessais': nb_reessais,
+        'taux_reessai': nb_reessais / nb_tentatives if nb_tentatives else 0,
+        'causes': causes
+    }
+
+    print(f"✓ {rapport['req_par_seconde']:.0f} req/s, {rapport['succes']}/{nb_requetes} réussies")
+    if latences:
+        print(f"   → p50 = {rapport['p50_ms']:.1f} ms, p95 = {rapport['p95_ms']:.1f} ms, "
+              f"p99 = {rapport['p99_ms']:.1f} ms, max = {rapport['max_ms']:.1f} ms")
+    print(f"   → {nb_reessais} nouvelles tentatives sur {nb_tentatives} essais "
+          f"({100 * rapport['taux_reessai']:.1f} %)")
+    if causes:
+        print("   → Causes : " + " · ".join(f"{cause} {nombre}" for cause, nombre in sorted(causes.items())))
+    print()
+    return rapport
+
+
+# ============================================================================
+# POINT D'ENTRÉE DU PROGRAMME
+# ============================================================================
+
+if __name__ == "__main__":
+    """
+    Point d'entrée : ce bloc s'exécute uniquement si le script est lancé directement
+    (pas si importé comme module)
+
+    Modes :
+        python unescowik.py                          → scraping + visualisations
+        python unescowik.py serveur [port]           → API sur la dernière liste historisée
+        python unescowik.py charge URL [qps] [duree] → test de charge de l'API
+        python unescowik.py wikidata DUMP [processus] → ingestion d'un dump Wikidata
+        python unescowik.py html DUMP [processus]     → ingestion d'un dump HTML / WARC
+        python unescowik.py pipeline URL [URL ...]    → pipeline concurrent sur plusieurs pages
+        python unescowik.py monuments [URL_INDEX]     → exploration des listes de monuments historiques
+        python unescowik.py publier [dossier]         → artefacts à empreinte + manifeste (sans navigateur)
+        python unescowik.py territoires [colonne] [dossier] → une carte par territoire + index
+        python unescowik.py simulation SOURCE [concurrence] [requetes] → serveur simulé + test de charge
+    """
+    mode = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if mode == 'serveur':
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+        lancer_serveur_api(charger_donnees_service(), port=port)
+    elif mode == 'charge':
+        qps = float(sys.argv[3]) if len(sys.argv) > 3 else 100
+        duree = float(sys.argv[4]) if len(sys.argv) > 4 else 10
+        tester_charge_api(sys.argv[2], qps, duree)
+    elif mode == 'wikidata':
+        processus = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        donnees = ingerer_dump_wikidata(sys.argv[2], processus)
+        if donnees is not None:
+            # L'identifiant Wikidata sert de clé stable dans l'historique
+            donnees['Id_site'] = donnees['Id_wikidata']
+            connexion = ouvrir_stock_instantanes(FICHIER_INSTANTANES)
+            try:
+                enregistrer_instantane(connexion, PAGE_WIKIDATA, donnees)
+            finally:
+                connexion.close()
+    elif mode == 'monuments':
+        url_index = sys.argv[2] if len(sys.argv) > 2 else URL_INDEX_MONUMENTS
+        donnees, _ = explorer_monuments(url_index)
+        connexion = ouvrir_stock_instantanes(FICHIER_INSTANTANES)
+        try:
+            enregistrer_instantane(connexion, url_index, donnees)
+        finally:
+            connexion.close()
+    elif mode == 'publier':
+        # Construction à partir de la dernière liste historisée : aucun téléchargement
+        dossier = sys.argv[2] if len(sys.argv) > 2 else DOSSIER_PUBLICATION
+        construire_artefacts(corriger_coordonnees_manquantes(charger_donnees_service()), dossier)
+    elif mode == 'territoires':
+        colonne = sys.argv[2] if len(sys.argv) > 2 else 'Region'
+        dossier = sys.argv[3] if len(sys.argv) > 3 else DOSSIER_CARTES_TERRITOIRES
+        generer_cartes_territoires(corriger_coordonnees_manquantes(charger_donnees_service()),
+                                   colonne, dossier)
+    elif mode == 'simulation':
+        concurrence = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+        nb_requetes = int(sys.argv[4]) if len(sys.argv) > 4 else 500
+        serveur = demarrer_serveur_simulation(sys.argv[2])
+        try:
+            hote, port = serveur.server_address[:2]
+            chemins = sorted(serveur.RequestHandlerClass.pages)
+            tester_charge_recuperation([f"http://{hote}:{port}{chemin}" for chemin in chemins],
+                                       concurrence, nb_requetes)
+        finally:
+            serveur.shutdown()
+            serveur.server_close()
+    elif mode == 'pipeline':
+        asyncio.run(executer_pipeline(sys.argv[2:]))
+    elif mode == 'html':
+        processus = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        connexion = ouvrir_stock_instantanes(FICHIER_INSTANTANES)
+        try:
+            # Chaque article est historisé sous son URL, comme un scraping en ligne
+            for resultat in ingerer_dump_html(sys.argv[2], processus=processus):
+                enregistrer_instantane(connexion, resultat['page'], resultat['donnees'],
+                                       resultat['revision'])
+        finally:
+            connexion.close()
+    else:
+        main()